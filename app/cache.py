@@ -0,0 +1,126 @@
+import os
+import time
+import logging
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Response cache for the aggregate endpoints. Uses Redis when REDIS_URL is set so
+# every worker shares one cache. Otherwise a per-process dict can be used, but only
+# with a single worker, since a write invalidates just its own process.
+REDIS_URL = os.getenv("REDIS_URL")
+KEY_PREFIX = "sw:"
+
+_redis = None
+if REDIS_URL:
+    try:
+        import redis.asyncio as aioredis
+        _redis = aioredis.from_url(REDIS_URL)
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed; using in-process cache")
+
+# Off unless explicitly enabled: this module cannot tell how many workers the server
+# was started with, and several workers would each serve their own copy until it expired.
+# Set ENABLE_LOCAL_CACHE only for single-process deployments; python -m app.main does so itself.
+LOCAL_ENABLED = bool(os.getenv("ENABLE_LOCAL_CACHE"))
+
+# Every invalidate bumps the key's generation; a value is stored under the generation that was
+# current when its computation started, so a read racing a write can never repopulate the cache
+GENERATION_PREFIX = "gen:"
+_generations: Dict[str, int] = {}
+
+_local: Dict[str, Tuple[float, bytes]] = {}
+# Last good value per key, kept without expiry and never invalidated, for serving during outages
+STALE_PREFIX = "fallback:"
+_stale: Dict[str, bytes] = {}
+
+def _redis_key(key: str, generation: int) -> str:
+    return f"{KEY_PREFIX}{key}:{generation}"
+
+async def get(key: str) -> Tuple[Optional[bytes], Optional[int]]:
+    """
+    Return (cached bytes or None if missing or expired, current generation of key).
+    Pass the generation to put() when caching a value computed after this call.
+    The generation is None when it could not be read, and put() then stores nothing.
+    """
+    if _redis is not None:
+        try:
+            generation = int(await _redis.get(KEY_PREFIX + GENERATION_PREFIX + key) or 0)
+            return await _redis.get(_redis_key(key, generation)), generation
+        except Exception as e:
+            logger.warning("Redis get failed for %s: %s", key, e)
+            return None, None
+
+    generation = _generations.get(key, 0)
+    if not LOCAL_ENABLED:
+        return None, generation
+    entry = _local.get(key)
+    if entry is None:
+        return None, generation
+    expires_at, value = entry
+    if time.monotonic() >= expires_at:
+        _local.pop(key, None)
+        return None, generation
+    return value, generation
+
+async def put(key: str, value: bytes, ttl: int, generation: Optional[int]) -> None:
+    """
+    Cache value under key for ttl seconds, unless key was invalidated since generation was read.
+    """
+    if generation is None:
+        return
+    if _redis is not None:
+        try:
+            # A superseded generation's entry is never read again and just expires
+            await _redis.set(_redis_key(key, generation), value, ex=ttl)
+        except Exception as e:
+            logger.warning("Redis set failed for %s: %s", key, e)
+        return
+
+    if LOCAL_ENABLED and _generations.get(key, 0) == generation:
+        _local[key] = (time.monotonic() + ttl, value)
+
+async def invalidate(*keys: str) -> None:
+    """
+    Drop the given keys, e.g. after a write changes the data behind them,
+    and bump their generations so values computed before now are not cached.
+    """
+    if _redis is not None:
+        try:
+            async with _redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(KEY_PREFIX + GENERATION_PREFIX + key)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Redis invalidate failed for %s: %s", keys, e)
+        return
+
+    for key in keys:
+        _generations[key] = _generations.get(key, 0) + 1
+        _local.pop(key, None)
+
+async def put_stale(key: str, value: bytes) -> None:
+    """
+    Keep value as the last known good copy for key, with no expiry.
+    """
+    if _redis is not None:
+        try:
+            await _redis.set(KEY_PREFIX + STALE_PREFIX + key, value)
+        except Exception as e:
+            logger.warning("Redis set failed for stale %s: %s", key, e)
+        return
+
+    _stale[key] = value
+
+async def get_stale(key: str) -> Optional[bytes]:
+    """
+    Return the last known good copy for key, however old, or None.
+    """
+    if _redis is not None:
+        try:
+            return await _redis.get(KEY_PREFIX + STALE_PREFIX + key)
+        except Exception as e:
+            logger.warning("Redis get failed for stale %s: %s", key, e)
+            return None
+
+    return _stale.get(key)
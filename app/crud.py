@@ -1,15 +1,58 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, text, bindparam, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
-from decimal import Decimal, ROUND_HALF_UP
-from typing import List, Optional, Dict
+from sqlalchemy.orm import raiseload
+from typing import List, Optional, Dict, AsyncIterator
+import asyncio
+import heapq
 import logging
+import math
 
-from app.models import Expense, SplitType
+from app.models import Expense, PersonBalance, DataMigration, SplitType
 from app.schemas import CreateExpense, UpdateExpense
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming large expense scans
+_STREAM_BATCH_SIZE = 1000
+
+# Balances within this many cents of zero are treated as settled
+_SETTLEMENT_THRESHOLD_CENTS = 1
+
+# CreateExpense's compiled validator, called directly to skip BaseModel.__init__
+_CREATE_EXPENSE_VALIDATOR = CreateExpense.__pydantic_validator__
+
+# Hot statements built once at import; per-call values are passed as bind parameters
+# Expense has no relationships today; raiseload makes any added later fail loudly here
+# instead of lazy loading once per row, so new relationships must be selectinload()ed
+_SELECT_ALL_ORDERED = select(Expense).options(raiseload("*")).order_by(Expense.created_at.desc())
+_SELECT_BY_ID = select(Expense).where(Expense.id == bindparam("eid"))
+_SELECT_BY_ID_FOR_UPDATE = _SELECT_BY_ID.with_for_update()
+_DELETE_BY_ID_RETURNING = (
+    delete(Expense)
+    .where(Expense.id == bindparam("eid"))
+    .returning(Expense.amount, Expense.paid_by, Expense.participants, Expense.split_type, Expense.shares)
+    .execution_options(synchronize_session=False)
+)
+_SELECT_BALANCE_CENTS = (
+    select(PersonBalance.person, PersonBalance.spent_cents, PersonBalance.owed_cents)
+    .order_by(PersonBalance.person)
+)
+# person_balances has exactly one row per person in any expense, so its primary key is the people list
+_SELECT_ALL_PEOPLE = select(PersonBalance.person).order_by(PersonBalance.person)
+# Every insert, update and delete changes the row count or the latest timestamp
+_SELECT_EXPENSES_VERSION = select(
+    func.count(Expense.id),
+    func.max(func.coalesce(Expense.updated_at, Expense.created_at))
+)
+
+# Written in the same transaction as the person_balances backfill; its presence is the only proof the backfill ran
+_BALANCES_BACKFILL_MIGRATION = "person_balances_backfill"
+
+# Split type values mapped to enum members, built once at import
+_SPLIT_TYPE_CACHE = {member.value: member for member in SplitType}
+
 async def create_expense(expense_data: CreateExpense, db: AsyncSession) -> Expense:
     """
     Create a new expense with validation for split logic.
@@ -36,59 +79,85 @@ async def create_expense(expense_data: CreateExpense, db: AsyncSession) -> Expen
             participants.append(expense_data.paid_by)
         
         # Create a complete expense object for validation
-        complete_expense_data = CreateExpense(
-            amount=expense_data.amount,
-            description=expense_data.description,
-            paid_by=expense_data.paid_by,
-            participants=participants,
-            split_type=expense_data.split_type,
-            shares=expense_data.shares,
-            category=expense_data.category
-        )
+        complete_expense_data = _CREATE_EXPENSE_VALIDATOR.validate_python({
+            "amount": expense_data.amount,
+            "description": expense_data.description,
+            "paid_by": expense_data.paid_by,
+            "participants": participants,
+            "split_type": expense_data.split_type,
+            "shares": expense_data.shares,
+            "category": expense_data.category
+        })
         
         # Validate split logic
         _validate_split_logic_complete(complete_expense_data)
         
-        # Create expense instance
-        db_expense = Expense(
-            amount=complete_expense_data.amount,
-            description=complete_expense_data.description,
-            paid_by=complete_expense_data.paid_by,
-            participants=complete_expense_data.participants,
-            split_type=SplitType(complete_expense_data.split_type),
-            shares=complete_expense_data.shares,
-            category=complete_expense_data.category
+        # Insert and read back server defaults (id, timestamps) in one round trip
+        result = await db.execute(
+            pg_insert(Expense)
+            .values(
+                amount=complete_expense_data.amount,
+                description=complete_expense_data.description,
+                paid_by=complete_expense_data.paid_by,
+                participants=complete_expense_data.participants,
+                split_type=_to_split_type(complete_expense_data.split_type),
+                shares=complete_expense_data.shares,
+                category=complete_expense_data.category
+            )
+            .returning(Expense)
+        )
+        db_expense = result.scalar_one()
+        
+        # Keep person_balances in step within the same transaction
+        deltas = {}
+        _add_balance_deltas(
+            deltas, 1, db_expense.amount_cents, db_expense.paid_by, db_expense.participants,
+            db_expense.split_type.value, db_expense.shares
         )
+        await _apply_balance_deltas(deltas, db)
         
-        db.add(db_expense)
         await db.commit()
-        await db.refresh(db_expense)
         
-        logger.info(f"Created expense: {db_expense.id} - {db_expense.description}")
+        logger.info("Created expense: %d - %s", db_expense.id, db_expense.description)
         return db_expense
         
     except SQLAlchemyError as e:
         await db.rollback()
-        logger.error(f"Database error creating expense: {e}")
+        logger.error("Database error creating expense: %s", e)
         raise
     except Exception as e:
         await db.rollback()
-        logger.error(f"Error creating expense: {e}")
+        logger.error("Error creating expense: %s", e)
         raise
 
-async def get_all_expenses(db: AsyncSession) -> List[Expense]:
+async def stream_all_expenses(db: AsyncSession) -> AsyncIterator[Expense]:
     """
-    Get all expenses ordered by created_at DESC.
+    Stream all expenses ordered by created_at DESC, fetching _STREAM_BATCH_SIZE
+    rows at a time, for responses written out as rows arrive.
     """
     try:
-        result = await db.execute(
-            select(Expense).order_by(Expense.created_at.desc())
+        result = await db.stream_scalars(
+            _SELECT_ALL_ORDERED.execution_options(yield_per=_STREAM_BATCH_SIZE)
+        )
+        async for expense in result:
+            yield expense
+    except SQLAlchemyError as e:
+        logger.error("Database error streaming expenses: %s", e)
+        raise
+
+async def stream_expenses_projection(db: AsyncSession, *columns) -> AsyncIterator[tuple]:
+    """
+    Stream the given Expense columns through a server-side cursor, fetching
+    _STREAM_BATCH_SIZE rows at a time so memory stays bounded on large tables.
+    """
+    try:
+        result = await db.stream(
+            select(*columns).execution_options(yield_per=_STREAM_BATCH_SIZE)
         )
-        expenses = result.scalars().all()
-        logger.info(f"Retrieved {len(expenses)} expenses")
-        return list(expenses)
+        async for row in result:
+            yield row
     except SQLAlchemyError as e:
-        logger.error(f"Database error retrieving expenses: {e}")
+        logger.error("Database error streaming expense columns: %s", e)
         raise
 
 async def get_expense_by_id(expense_id: int, db: AsyncSession) -> Optional[Expense]:
@@ -96,28 +165,28 @@ async def get_expense_by_id(expense_id: int, db: AsyncSession) -> Optional[Expen
     Get a single expense by ID.
     """
     try:
-        result = await db.execute(
-            select(Expense).where(Expense.id == expense_id)
-        )
+        result = await db.execute(_SELECT_BY_ID, {"eid": expense_id})
         expense = result.scalar_one_or_none()
         
         if expense:
-            logger.info(f"Retrieved expense: {expense_id}")
+            logger.info("Retrieved expense: %d", expense_id)
         else:
-            logger.info(f"Expense not found: {expense_id}")
+            logger.info("Expense not found: %d", expense_id)
         
         return expense
     except SQLAlchemyError as e:
-        logger.error(f"Database error retrieving expense {expense_id}: {e}")
+        logger.error("Database error retrieving expense %d: %s", expense_id, e)
         raise
 
 async def update_expense(expense_id: int, expense_data: UpdateExpense, db: AsyncSession) -> Optional[Expense]:
     """
     Update an expense with validation.
+    The row is locked on read and written back with a single UPDATE ... RETURNING.
     """
     try:
-        # First, get the existing expense
-        existing_expense = await get_expense_by_id(expense_id, db)
+        # First, get and lock the existing expense
+        result = await db.execute(_SELECT_BY_ID_FOR_UPDATE, {"eid": expense_id})
+        existing_expense = result.scalar_one_or_none()
         if not existing_expense:
             return None
         
@@ -139,7 +208,7 @@ async def update_expense(expense_id: int, expense_data: UpdateExpense, db: Async
             update_data['participants'] = expense_data.participants
         
         if expense_data.split_type is not None:
-            update_data['split_type'] = SplitType(expense_data.split_type)
+            update_data['split_type'] = _to_split_type(expense_data.split_type)
         
         if expense_data.shares is not None:
             update_data['shares'] = expense_data.shares
@@ -159,266 +228,485 @@ async def update_expense(expense_id: int, expense_data: UpdateExpense, db: Async
         }
         
         # Validate the complete updated expense
-        temp_expense = CreateExpense(**temp_data)
+        temp_expense = _CREATE_EXPENSE_VALIDATOR.validate_python(temp_data)
         _validate_split_logic(temp_expense)
         
         # Validate paid_by is in participants
         if temp_data['paid_by'] not in temp_data['participants']:
             raise ValueError("paid_by must be one of the participants")
         
-        # Perform the update
-        await db.execute(
+        # Take back the old contribution to person_balances; computed before the UPDATE,
+        # which refreshes existing_expense in place
+        deltas = {}
+        _add_balance_deltas(
+            deltas, -1, existing_expense.amount_cents, existing_expense.paid_by, existing_expense.participants,
+            existing_expense.split_type.value, existing_expense.shares
+        )
+        
+        # Perform the update and get the new row back in the same round trip
+        result = await db.execute(
             update(Expense)
             .where(Expense.id == expense_id)
             .values(**update_data)
+            .returning(Expense)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
+        updated_expense = result.scalar_one()
         
-        await db.commit()
+        # Add the new contribution from the stored row, so both sides use the column's rounding
+        _add_balance_deltas(
+            deltas, 1, updated_expense.amount_cents, updated_expense.paid_by, updated_expense.participants,
+            updated_expense.split_type.value, updated_expense.shares
+        )
+        await _apply_balance_deltas(deltas, db)
         
-        # Return the updated expense
-        updated_expense = await get_expense_by_id(expense_id, db)
-        logger.info(f"Updated expense: {expense_id}")
+        await db.commit()
+        logger.info("Updated expense: %d", expense_id)
         return updated_expense
         
     except SQLAlchemyError as e:
         await db.rollback()
-        logger.error(f"Database error updating expense {expense_id}: {e}")
+        logger.error("Database error updating expense %d: %s", expense_id, e)
         raise
     except Exception as e:
         await db.rollback()
-        logger.error(f"Error updating expense {expense_id}: {e}")
+        logger.error("Error updating expense %d: %s", expense_id, e)
         raise
 
 async def delete_expense(expense_id: int, db: AsyncSession) -> bool:
     """
     Delete an expense by ID.
+    The existence check is folded into DELETE ... RETURNING.
     """
     try:
-        # Check if expense exists
-        existing_expense = await get_expense_by_id(expense_id, db)
-        if not existing_expense:
+        # Delete the expense, getting back what is needed to undo its balances
+        result = await db.execute(_DELETE_BY_ID_RETURNING, {"eid": expense_id})
+        deleted = result.first()
+        if deleted is None:
             return False
         
-        # Delete the expense
-        await db.execute(
-            delete(Expense).where(Expense.id == expense_id)
-        )
+        # Remove its contribution from person_balances
+        amount, paid_by, participants, split_type, shares = deleted
+        deltas = {}
+        _add_balance_deltas(deltas, -1, _to_cents(amount), paid_by, participants, split_type.value, shares)
+        await _apply_balance_deltas(deltas, db)
         
         await db.commit()
-        logger.info(f"Deleted expense: {expense_id}")
+        logger.info("Deleted expense: %d", expense_id)
         return True
         
     except SQLAlchemyError as e:
         await db.rollback()
-        logger.error(f"Database error deleting expense {expense_id}: {e}")
+        logger.error("Database error deleting expense %d: %s", expense_id, e)
         raise
 
 async def calculate_balances(db: AsyncSession) -> List[Dict[str, any]]:
     """
-    Calculate balances for each person based on expenses.
+    Get balances for each person from the incrementally maintained person_balances table.
     Returns: [{"person": str, "spent": float, "owed": float, "balance": float}]
     """
     try:
-        # Get all expenses
-        expenses = await get_all_expenses(db)
-        
-        if not expenses:
-            return []
-        
-        # Initialize balance tracking
-        balances = {}
+        rows = await _get_balance_cents(db)
         
-        for expense in expenses:
-            amount = Decimal(str(expense.amount))
-            participants = expense.participants
-            paid_by = expense.paid_by
-            split_type = expense.split_type.value
-            shares = expense.shares or {}
-            
-            # Initialize people if not seen before
-            all_people = set([paid_by] + participants)
-            for person in all_people:
-                if person not in balances:
-                    balances[person] = {"spent": Decimal('0'), "owed": Decimal('0')}
-            
-            # Add amount paid
-            balances[paid_by]["spent"] += amount
-            
-            # Calculate what each person owes
-            if split_type == "equal":
-                per_person = amount / Decimal(len(participants))
-                for participant in participants:
-                    balances[participant]["owed"] += per_person
-            
-            elif split_type == "percentage":
-                for participant, percentage in shares.items():
-                    owed_amount = amount * (Decimal(str(percentage)) / Decimal('100'))
-                    balances[participant]["owed"] += owed_amount
-            
-            elif split_type == "exact":
-                for participant, exact_amount in shares.items():
-                    balances[participant]["owed"] += Decimal(str(exact_amount))
-        
-        # Convert to response format with proper rounding
-        result = []
-        for person, data in balances.items():
-            spent = float(data["spent"].quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-            owed = float(data["owed"].quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-            balance = float((data["spent"] - data["owed"]).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-            
-            result.append({
+        balances = [
+            {
                 "person": person,
-                "spent": spent,
-                "owed": owed,
-                "balance": balance
-            })
+                "spent": _cents_to_float(spent_cents),
+                "owed": _cents_to_float(owed_cents),
+                "balance": _cents_to_float(spent_cents - owed_cents)
+            }
+            for person, spent_cents, owed_cents in rows
+        ]
         
-        # Sort by person name for consistency
-        result.sort(key=lambda x: x["person"])
-        logger.info(f"Calculated balances for {len(result)} people")
-        return result
+        logger.info("Calculated balances for %d people", len(balances))
+        return balances
         
     except Exception as e:
-        logger.error(f"Error calculating balances: {e}")
+        logger.error("Error calculating balances: %s", e)
+        raise
+
+async def ensure_person_balances(db: AsyncSession) -> None:
+    """
+    Rebuild person_balances from every expense unless the backfill migration is recorded as done.
+    Rows already in the table are not trusted, since writes may have landed before a failed backfill.
+    Writers are blocked while this runs so no delta is lost or applied twice.
+    """
+    try:
+        await db.execute(text("LOCK TABLE expenses IN SHARE MODE"))
+        await db.execute(text("LOCK TABLE person_balances IN EXCLUSIVE MODE"))
+        
+        done = await db.get(DataMigration, _BALANCES_BACKFILL_MIGRATION)
+        if done is not None:
+            await db.commit()
+            return
+        
+        await db.execute(delete(PersonBalance))
+        soa = await _load_expenses_soa(db)
+        # Pure CPU work on plain lists; run it off the event loop
+        deltas = await asyncio.to_thread(_aggregate_balance_cents, soa)
+        await _apply_balance_deltas(deltas, db)
+        db.add(DataMigration(name=_BALANCES_BACKFILL_MIGRATION))
+        
+        await db.commit()
+        logger.info("Backfilled person balances for %d people", len(deltas))
+        
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error("Database error backfilling person balances: %s", e)
         raise
 
 async def calculate_settlements(db: AsyncSession) -> List[Dict[str, any]]:
     """
     Calculate simplified settlements to minimize transactions.
+    Greedily pairs the largest creditor with the largest debtor, in integer cents.
     Returns: [{"from": str, "to": str, "amount": float}]
     """
     try:
-        balances_data = await calculate_balances(db)
+        rows = await _get_balance_cents(db)
         
-        if not balances_data:
-            return []
+        # Max-heaps of (-cents, person) for people who are owed money and people who owe money
+        creditors = []
+        debtors = []
+        for person, spent_cents, owed_cents in rows:
+            balance_cents = spent_cents - owed_cents
+            if balance_cents > _SETTLEMENT_THRESHOLD_CENTS:
+                creditors.append((-balance_cents, person))
+            elif balance_cents < -_SETTLEMENT_THRESHOLD_CENTS:
+                debtors.append((balance_cents, person))
         
-        # Separate creditors (positive balance) and debtors (negative balance)
-        creditors = []  # People who are owed money
-        debtors = []    # People who owe money
+        heapq.heapify(creditors)
+        heapq.heapify(debtors)
         
-        for person_data in balances_data:
-            balance = Decimal(str(person_data["balance"]))
-            if balance > Decimal('0.01'):  # Small threshold to handle floating point precision
-                creditors.append({"person": person_data["person"], "amount": balance})
-            elif balance < Decimal('-0.01'):
-                debtors.append({"person": person_data["person"], "amount": abs(balance)})
-        
-        # Generate settlements using greedy algorithm
         settlements = []
-        creditors.sort(key=lambda x: x["amount"], reverse=True)
-        debtors.sort(key=lambda x: x["amount"], reverse=True)
-        
-        i, j = 0, 0
-        while i < len(creditors) and j < len(debtors):
-            creditor = creditors[i]
-            debtor = debtors[j]
-            
-            # Calculate settlement amount
-            settlement_amount = min(creditor["amount"], debtor["amount"])
-            
-            if settlement_amount > Decimal('0.01'):  # Only create settlement if meaningful amount
-                settlements.append({
-                    "from": debtor["person"],
-                    "to": creditor["person"],
-                    "amount": float(settlement_amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-                })
+        while creditors and debtors:
+            credit, creditor = heapq.heappop(creditors)
+            debt, debtor = heapq.heappop(debtors)
+            amount_cents = min(-credit, -debt)
             
-            # Update remaining amounts
-            creditor["amount"] -= settlement_amount
-            debtor["amount"] -= settlement_amount
+            settlements.append({
+                "from": debtor,
+                "to": creditor,
+                "amount": _cents_to_float(amount_cents)
+            })
             
-            # Move to next creditor/debtor if current one is settled
-            if creditor["amount"] <= Decimal('0.01'):
-                i += 1
-            if debtor["amount"] <= Decimal('0.01'):
-                j += 1
+            # Put back whoever still has something left to settle
+            if -credit - amount_cents > _SETTLEMENT_THRESHOLD_CENTS:
+                heapq.heappush(creditors, (credit + amount_cents, creditor))
+            if -debt - amount_cents > _SETTLEMENT_THRESHOLD_CENTS:
+                heapq.heappush(debtors, (debt + amount_cents, debtor))
         
-        logger.info(f"Calculated {len(settlements)} settlements")
+        logger.info("Calculated %d settlements", len(settlements))
         return settlements
         
     except Exception as e:
-        logger.error(f"Error calculating settlements: {e}")
+        logger.error("Error calculating settlements: %s", e)
         raise
 
 async def get_all_people(db: AsyncSession) -> List[str]:
     """
     Get all unique people from expenses (paid_by + participants).
+    Read from the person_balances primary key rather than unnesting every expense.
     Returns: Sorted list of unique names
     """
     try:
-        expenses = await get_all_expenses(db)
-        
-        if not expenses:
-            return []
-        
-        people = set()
+        result = await db.execute(_SELECT_ALL_PEOPLE)
+        people_list = list(result.scalars().all())
         
-        for expense in expenses:
-            # Add the person who paid
-            people.add(expense.paid_by)
-            # Add all participants
-            people.update(expense.participants)
+        logger.info("Found %d unique people", len(people_list))
+        return people_list
         
-        # Convert to sorted list
-        result = sorted(list(people))
-        logger.info(f"Found {len(result)} unique people")
-        return result
+    except Exception as e:
+        logger.error("Error getting all people: %s", e)
+        raise
+
+async def get_expenses_version(db: AsyncSession) -> str:
+    """
+    Cheap fingerprint of the expenses table, for clients to check before refetching every expense.
+    Returns: "<row count>-<latest created/updated time>"
+    """
+    try:
+        result = await db.execute(_SELECT_EXPENSES_VERSION)
+        count, last_modified = result.one()
+        return f"{count}-{last_modified.isoformat() if last_modified else ''}"
         
     except Exception as e:
-        logger.error(f"Error getting all people: {e}")
+        logger.error("Error getting expenses version: %s", e)
         raise
 
-def _validate_split_logic_complete(expense_data: CreateExpense) -> None:
+async def _get_balance_cents(db: AsyncSession) -> List[tuple]:
     """
-    Validate split logic based on split type for complete expense data.
+    Read (person, spent_cents, owed_cents) rows from person_balances, ordered by person.
+    """
+    result = await db.execute(_SELECT_BALANCE_CENTS)
+    return result.all()
+
+def _to_split_type(value: str) -> SplitType:
+    """
+    Look up the SplitType member for a split type string.
+    """
+    try:
+        return _SPLIT_TYPE_CACHE[value]
+    except KeyError:
+        raise ValueError(f"Invalid split type: {value}")
+
+def _to_cents(value: float) -> int:
     """
-    split_type = expense_data.split_type
-    participants = expense_data.participants
-    shares = expense_data.shares
-    amount = expense_data.amount
+    Convert a currency amount to integer cents.
+    """
+    return round(value * 100)
+
+def _cents_to_float(cents: int) -> float:
+    return cents / 100
+
+def _split_equal(amount_cents: int, participants: List[str], shares: Optional[Dict[str, float]]) -> Dict[str, int]:
+    """
+    Equal split in cents; the leftover cents go to the first participants so the shares add up to the amount.
+    """
+    per_person, remainder = divmod(amount_cents, len(participants))
+    return {
+        participant: per_person + (1 if i < remainder else 0)
+        for i, participant in enumerate(participants)
+    }
+
+def _split_percentage(amount_cents: int, participants: List[str], shares: Optional[Dict[str, float]]) -> Dict[str, int]:
+    """
+    Percentage split in cents; percentages are applied as basis points so everything stays in integer arithmetic.
+    """
+    return {
+        participant: (amount_cents * round(percentage * 100) + 5000) // 10000
+        for participant, percentage in shares.items()
+    }
+
+def _split_exact(amount_cents: int, participants: List[str], shares: Optional[Dict[str, float]]) -> Dict[str, int]:
+    """
+    Exact split in cents.
+    """
+    return {participant: _to_cents(exact_amount) for participant, exact_amount in shares.items()}
+
+# Split type -> per-expense split function; SplitType is a str enum, so
+# members and their raw string values hit the same entry
+_SPLIT_HANDLERS = {
+    SplitType.equal: _split_equal,
+    SplitType.percentage: _split_percentage,
+    SplitType.exact: _split_exact,
+}
+
+def _split_cents(amount_cents: int, participants: List[str], split_type: str, shares: Optional[Dict[str, float]]) -> Dict[str, int]:
+    """
+    Work out what each participant owes for a single expense, in cents.
+    """
+    return _SPLIT_HANDLERS[split_type](amount_cents, participants, shares)
+
+def _add_balance_deltas(deltas: Dict[str, List[int]], sign: int, amount_cents: int, paid_by: str,
+                        participants: List[str], split_type: str, shares: Optional[Dict[str, float]]) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) one expense's contribution to per-person
+    [spent_cents, owed_cents, expense_count] deltas.
+    """
+    for person in set([paid_by] + participants):
+        deltas.setdefault(person, [0, 0, 0])[2] += sign
+    
+    deltas[paid_by][0] += sign * amount_cents
+    
+    for person, owed_cents in _split_cents(amount_cents, participants, split_type, shares).items():
+        deltas.setdefault(person, [0, 0, 0])[1] += sign * owed_cents
+
+async def _load_expenses_soa(db: AsyncSession) -> Dict[str, list]:
+    """
+    Load the columns needed for balance aggregation as parallel lists (structure of arrays).
+    People are integer-encoded through "persons". Each expense's participants and share
+    values sit in flat lists, expense i owning positions offsets[i]:offsets[i + 1].
+    Share values are basis points for percentage splits and cents for exact splits.
+    """
+    rows = stream_expenses_projection(
+        db, Expense.amount, Expense.paid_by, Expense.participants, Expense.split_type, Expense.shares
+    )
+    
+    person_index = {}
+    soa = {
+        "persons": [],
+        "amount_cents": [],
+        "paid_by_idx": [],
+        "split_type": [],
+        "offsets": [0],
+        "participant_idx": [],
+        "share_value": []
+    }
+    
+    async for amount, paid_by, participants, split_type, shares in rows:
+        split_type = split_type.value
+        soa["amount_cents"].append(_to_cents(amount))
+        soa["paid_by_idx"].append(person_index.setdefault(paid_by, len(person_index)))
+        soa["split_type"].append(split_type)
+        
+        for participant in participants:
+            soa["participant_idx"].append(person_index.setdefault(participant, len(person_index)))
+            if split_type == "percentage":
+                soa["share_value"].append(round(shares[participant] * 100))
+            elif split_type == "exact":
+                soa["share_value"].append(_to_cents(shares[participant]))
+            else:
+                soa["share_value"].append(0)
+        soa["offsets"].append(len(soa["participant_idx"]))
+    
+    soa["persons"] = list(person_index)
+    return soa
+
+def _agg_equal_generic(owed: List[int], idx: List[int], start: int, end: int, amount_cents: int) -> None:
+    """
+    Add an equal split to owed; the remainder cents go to the first participants.
+    """
+    per_person, remainder = divmod(amount_cents, end - start)
+    for k in range(start, end):
+        owed[idx[k]] += per_person + (1 if k - start < remainder else 0)
+
+def _build_equal_split_fn(n: int):
+    """
+    Generate an unrolled _agg_equal_generic for exactly n participants.
+    """
+    lines = [
+        "def _agg_equal_%d(owed, idx, start, end, amount_cents):" % n,
+        "    per_person, remainder = divmod(amount_cents, %d)" % n,
+    ]
+    for k in range(n):
+        lines.append("    owed[idx[start + %d]] += per_person + (%d < remainder)" % (k, k))
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_agg_equal_%d" % n]
+
+# Unrolled equal-split kernels for the common participant counts
+_EQUAL_SPLIT_FNS = {n: _build_equal_split_fn(n) for n in range(1, 17)}
+
+def _aggregate_balance_cents(soa: Dict[str, list]) -> Dict[str, List[int]]:
+    """
+    Pure integer kernel: fold the columns from _load_expenses_soa into per-person
+    [spent_cents, owed_cents, expense_count] totals.
+    Uses the same rounding as _split_cents so a backfill matches incremental updates.
+    """
+    persons = soa["persons"]
+    amounts = soa["amount_cents"]
+    paid_by_idx = soa["paid_by_idx"]
+    split_types = soa["split_type"]
+    offsets = soa["offsets"]
+    participant_idx = soa["participant_idx"]
+    share_value = soa["share_value"]
+    
+    spent = [0] * len(persons)
+    owed = [0] * len(persons)
+    count = [0] * len(persons)
+    
+    for i in range(len(amounts)):
+        amount_cents = amounts[i]
+        start, end = offsets[i], offsets[i + 1]
+        spent[paid_by_idx[i]] += amount_cents
+        
+        if split_types[i] == "equal":
+            _EQUAL_SPLIT_FNS.get(end - start, _agg_equal_generic)(owed, participant_idx, start, end, amount_cents)
+        elif split_types[i] == "percentage":
+            for k in range(start, end):
+                owed[participant_idx[k]] += (amount_cents * share_value[k] + 5000) // 10000
+        else:
+            for k in range(start, end):
+                owed[participant_idx[k]] += share_value[k]
+        
+        for k in range(start, end):
+            count[participant_idx[k]] += 1
+        if paid_by_idx[i] not in participant_idx[start:end]:
+            count[paid_by_idx[i]] += 1
+    
+    return {persons[j]: [spent[j], owed[j], count[j]] for j in range(len(persons))}
+
+async def _apply_balance_deltas(deltas: Dict[str, List[int]], db: AsyncSession) -> None:
+    """
+    Upsert per-person deltas into person_balances and drop people no longer in any expense.
+    Rows are written in person order so concurrent writers lock them in the same order.
+    """
+    rows = [
+        {"person": person, "spent_cents": spent, "owed_cents": owed, "expense_count": count}
+        for person, (spent, owed, count) in sorted(deltas.items())
+        if spent or owed or count
+    ]
+    if not rows:
+        return
     
-    if split_type == "equal":
-        if shares is not None:
-            raise ValueError("shares should not be provided for equal split")
+    stmt = pg_insert(PersonBalance).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PersonBalance.person],
+        set_={
+            "spent_cents": PersonBalance.spent_cents + stmt.excluded.spent_cents,
+            "owed_cents": PersonBalance.owed_cents + stmt.excluded.owed_cents,
+            "expense_count": PersonBalance.expense_count + stmt.excluded.expense_count,
+        }
+    )
+    await db.execute(stmt)
     
-    elif split_type == "percentage":
-        if shares is None:
-            raise ValueError("shares must be provided for percentage split")
-        
-        # Check if all participants have shares
-        missing_participants = set(participants) - set(shares.keys())
-        if missing_participants:
-            raise ValueError(f"Missing shares for participants: {missing_participants}")
-        
-        # Check if there are extra participants in shares
-        extra_participants = set(shares.keys()) - set(participants)
-        if extra_participants:
-            raise ValueError(f"Shares provided for non-participants: {extra_participants}")
-        
-        # Check if percentages sum to 100
-        total_percentage = sum(shares.values())
-        if abs(total_percentage - 100) > 0.01:
-            raise ValueError(f"Percentages must sum to 100, got {total_percentage}")
+    if any(row["expense_count"] < 0 for row in rows):
+        await db.execute(delete(PersonBalance).where(PersonBalance.expense_count <= 0))
+
+def _validate_share_keys(participants: List[str], shares: Dict[str, float]) -> None:
+    """
+    Check that shares has an entry for every participant and nobody else.
+    The common all-match case is a single set comparison; the differences are only
+    worked out when there is an error to report.
+    """
+    participant_set = frozenset(participants)
+    if shares.keys() == participant_set:
+        return
+    
+    missing_participants = participant_set - shares.keys()
+    if missing_participants:
+        raise ValueError(f"Missing shares for participants: {set(missing_participants)}")
     
-    elif split_type == "exact":
-        if shares is None:
-            raise ValueError("shares must be provided for exact split")
-        
-        # Check if all participants have shares
-        missing_participants = set(participants) - set(shares.keys())
-        if missing_participants:
-            raise ValueError(f"Missing shares for participants: {missing_participants}")
-        
-        # Check if there are extra participants in shares
-        extra_participants = set(shares.keys()) - set(participants)
-        if extra_participants:
-            raise ValueError(f"Shares provided for non-participants: {extra_participants}")
-        
-        # Check if exact amounts sum to total amount
-        total_shares = sum(shares.values())
-        if abs(total_shares - amount) > 0.01:
-            raise ValueError(f"Exact shares must sum to total amount {amount}, got {total_shares}")
+    extra_participants = shares.keys() - participant_set
+    raise ValueError(f"Shares provided for non-participants: {extra_participants}")
+
+def _validate_equal(participants: List[str], shares: Optional[Dict[str, float]], amount: float) -> None:
+    """
+    Validate an equal split: no shares allowed.
+    """
+    if shares is not None:
+        raise ValueError("shares should not be provided for equal split")
+
+def _validate_percentage(participants: List[str], shares: Optional[Dict[str, float]], amount: float) -> None:
+    """
+    Validate a percentage split: shares cover exactly the participants and sum to 100.
+    """
+    if shares is None:
+        raise ValueError("shares must be provided for percentage split")
+    
+    _validate_share_keys(participants, shares)
+    
+    total_percentage = math.fsum(shares.values())
+    if abs(total_percentage - 100) > 0.01:
+        raise ValueError(f"Percentages must sum to 100, got {total_percentage}")
+
+def _validate_exact(participants: List[str], shares: Optional[Dict[str, float]], amount: float) -> None:
+    """
+    Validate an exact split: shares cover exactly the participants and sum to the amount.
+    """
+    if shares is None:
+        raise ValueError("shares must be provided for exact split")
+    
+    _validate_share_keys(participants, shares)
+    
+    total_shares = math.fsum(shares.values())
+    if abs(total_shares - amount) > 0.01:
+        raise ValueError(f"Exact shares must sum to total amount {amount}, got {total_shares}")
+
+# Split type -> specialized validator
+_VALIDATORS = {
+    "equal": _validate_equal,
+    "percentage": _validate_percentage,
+    "exact": _validate_exact,
+}
+
+def _validate_split_logic_complete(expense_data: CreateExpense) -> None:
+    """
+    Validate split logic based on split type for complete expense data.
+    """
+    _VALIDATORS[expense_data.split_type](
+        expense_data.participants, expense_data.shares, expense_data.amount
+    )
 
 def _validate_split_logic(expense_data: CreateExpense) -> None:
     """
@@ -1,9 +1,12 @@
 import os
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import orjson
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, async_scoped_session
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import text
 from dotenv import load_dotenv
@@ -21,12 +24,38 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
+# Always go through asyncpg, whichever postgres scheme the URL was given with
+for _scheme in ("postgres://", "postgresql://", "postgresql+psycopg://", "postgresql+psycopg2://"):
+    if DATABASE_URL.startswith(_scheme):
+        DATABASE_URL = "postgresql+asyncpg://" + DATABASE_URL[len(_scheme):]
+        break
+
+# Pool sizing, overridable per deployment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+# Set to 0 behind PgBouncer in transaction pooling mode, which cannot keep prepared statements
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1024"))
+
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,  # Set to True for SQL query logging
+    echo_pool=False,
+    pool_size=DB_POOL_SIZE,  # Connections kept open for concurrent requests
+    max_overflow=DB_MAX_OVERFLOW,  # Extra connections allowed under bursts
+    pool_timeout=DB_POOL_TIMEOUT,  # Seconds to wait for a free connection
     pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=300,  # Recycle connections every 5 minutes
+    pool_recycle=DB_POOL_RECYCLE,  # Recycle connections after this many seconds
+    pool_reset_on_return="rollback",
+    # orjson for the JSONB columns in both directions
+    json_serializer=lambda value: orjson.dumps(value).decode(),
+    json_deserializer=orjson.loads,
+    connect_args={
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,  # SQLAlchemy's per-connection prepared statement cache
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,  # asyncpg's own statement cache
+    },
 )
 
 # Create async session factory
@@ -36,23 +65,24 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+# One session per asyncio task; a request and its dependencies run in the same task
+AsyncScopedSession = async_scoped_session(AsyncSessionLocal, scopefunc=asyncio.current_task)
+
 # Base class for models
 Base = declarative_base()
 
 # Dependency to get database session
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    FastAPI dependency that provides a database session.
+    FastAPI dependency that provides the current task's scoped session.
+    remove() closes it at the end of the request, which also rolls back
+    any transaction left open by an error.
     """
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        except Exception as e:
-            logger.error(f"Database session error: {e}")
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+    session = AsyncScopedSession()
+    try:
+        yield session
+    finally:
+        await AsyncScopedSession.remove()
 
 # Test connection function
 async def test_connection() -> bool:
@@ -67,9 +97,30 @@ async def test_connection() -> bool:
             logger.info("Database connection test successful")
             return True
     except Exception as e:
-        logger.error(f"Database connection test failed: {e}")
+        logger.error("Database connection test failed: %s", e)
         return False
 
+# Seconds a health probe result is reused before the database is queried again
+_PROBE_TTL = 2.0
+_last_probe = (0.0, False)
+_probe_lock = asyncio.Lock()
+
+async def cached_test_connection() -> bool:
+    """
+    test_connection() for health endpoints: reuses the last result for _PROBE_TTL
+    seconds, and concurrent callers share a single probe.
+    """
+    global _last_probe
+    if time.monotonic() - _last_probe[0] < _PROBE_TTL:
+        return _last_probe[1]
+    async with _probe_lock:
+        # Another caller may have refreshed the result while we waited
+        if time.monotonic() - _last_probe[0] < _PROBE_TTL:
+            return _last_probe[1]
+        healthy = await test_connection()
+        _last_probe = (time.monotonic(), healthy)
+        return healthy
+
 @asynccontextmanager
 async def get_session():
     """
@@ -77,11 +128,4 @@ async def get_session():
     Alternative to get_db() for direct use.
     """
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        except Exception as e:
-            logger.error(f"Database session error: {e}")
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+        yield session
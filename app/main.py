@@ -1,159 +1,153 @@
 import asyncio
+import atexit
+import orjson
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 import logging
+import logging.handlers
+import queue
 import os
+import re
+try:
+    import re2 as origin_re  # linear-time DFA matching when google-re2 is installed
+except ImportError:
+    origin_re = re
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
 from fastapi.exceptions import RequestValidationError
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
+from sqlalchemy import text
 
 from app.routes import router
-from app.database import test_connection, engine, Base, AsyncSessionLocal
-from app.models import Expense, SplitType
+from app.database import test_connection, cached_test_connection, engine, Base, AsyncSessionLocal, DB_POOL_SIZE
+from app.models import Expense, SplitType, SCHEMA_UPGRADES
 from app.schemas import CreateExpense, UpdateExpense, ExpenseResponse
 import app.crud as crud
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: records are queued on the event loop thread and written
+# to stderr by a listener thread, so log calls never block on stream I/O.
+# python -m app.main imports this module twice (as __main__ and as app.main),
+# so the second import keeps the queue handler the first one installed.
+if not any(isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger().handlers):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.handlers.QueueHandler(queue.SimpleQueue())],
+        force=True  # app.database configures logging first on import
+    )
 logger = logging.getLogger(__name__)
+_log_listener: Optional[logging.handlers.QueueListener] = None
 
-# Create FastAPI app instance
-app = FastAPI(
-    title="Splitwise API",
-    description="""
-A production-ready expense sharing and bill splitting API built with FastAPI and PostgreSQL.
-
-**How to Use:**
-- All endpoints are under `/api/v1`.
-- To create or update an expense, you must provide a valid JSON body matching the required schema.
-- See the `/docs` tab for interactive API usage and example requests.
-
-**Expense Requirements:**
-- `amount` (float): Must be positive.
-- `description` (string): Required, cannot be empty.
-- `paid_by` (string): Must be one of the `participants`.
-- `participants` (list of strings): At least one, all must be non-empty.
-- `split_type` (string): One of `equal`, `percentage`, or `exact`.
-- `shares` (dict):
-    - For `equal` split: Omit this field.
-    - For `percentage` split: Required, must sum to 100, keys must match participants.
-    - For `exact` split: Required, must sum to `amount`, keys must match participants.
-- `category` (string, optional): Any string.
+def _start_log_listener() -> None:
+    """Start the thread that writes queued records to stderr; safe to call more than once"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    queue_handler = next(h for h in logging.getLogger().handlers if isinstance(h, logging.handlers.QueueHandler))
+    _log_listener = logging.handlers.QueueListener(queue_handler.queue, logging.StreamHandler())
+    _log_listener.start()
+    # Stopped at interpreter exit, after uvicorn's own shutdown messages, which stop() still flushes
+    atexit.register(_log_listener.stop)
 
-**Sample Requests:**
+# Advisory lock key serializing startup DDL across workers
+_SCHEMA_LOCK_KEY = 7212001
 
-*POST /api/v1/expenses* (Equal split)
-```json
-{
-  "amount": 120.0,
-  "description": "Team lunch",
-  "paid_by": "Alice",
-  "participants": ["Alice", "Bob", "Charlie"],
-  "split_type": "equal",
-  "category": "Food"
-}
-```
+async def _create_tables() -> None:
+    """Create tables and apply schema upgrades, one worker at a time"""
+    async with engine.begin() as conn:
+        # Held until this transaction commits; later workers find everything in place
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _SCHEMA_LOCK_KEY})
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+    logger.info("✅ Database tables created or already exist.")
 
-*POST /api/v1/expenses* (Percentage split)
-```json
-{
-  "amount": 200.0,
-  "description": "Groceries",
-  "paid_by": "Bob",
-  "participants": ["Alice", "Bob", "Charlie"],
-  "split_type": "percentage",
-  "shares": {
-    "Alice": 40.0,
-    "Bob": 40.0,
-    "Charlie": 20.0
-  },
-  "category": "Groceries"
-}
-```
-
-*POST /api/v1/expenses* (Exact split)
-```json
-{
-  "amount": 150.0,
-  "description": "Movie tickets",
-  "paid_by": "Charlie",
-  "participants": ["Alice", "Bob", "Charlie"],
-  "split_type": "exact",
-  "shares": {
-    "Alice": 50.0,
-    "Bob": 50.0,
-    "Charlie": 50.0
-  },
-  "category": "Entertainment"
-}
-```
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    _start_log_listener()
+    logger.info("🚀 Splitwise API is starting up...")
+    try:
+        # The connectivity probe and table creation run concurrently on separate pool connections
+        db_connected, _ = await asyncio.gather(test_connection(), _create_tables())
+        if db_connected:
+            logger.info("✅ Database connection established")
+        else:
+            logger.warning("⚠️ Database connection failed during startup")
+        async with AsyncSessionLocal() as db:
+            await crud.ensure_person_balances(db)
+    except Exception as e:
+        # Refuse to serve: writes accepted before the balance backfill has run would leave
+        # the aggregate endpoints missing every earlier expense
+        logger.error("❌ Database setup failed during startup: %s", e)
+        raise
+    if ENABLE_DOCS:
+        # Build the OpenAPI schema now rather than on the first /openapi.json hit
+        global _openapi_body
+        _openapi_body = orjson.dumps(app.openapi())
+    logger.info("🎉 Splitwise API startup complete!")
+    
+    yield
+    
+    logger.info("🛑 Splitwise API is shutting down...")
+    await engine.dispose()
+    logger.info("👋 Goodbye!")
 
-*PUT /api/v1/expenses/{expense_id}* (Update amount and description)
-```json
-{
-  "amount": 180.0,
-  "description": "Updated team lunch"
-}
-```
+# Interactive docs and the OpenAPI schema are only served when ENABLE_DOCS is set
+ENABLE_DOCS = bool(os.environ.get("ENABLE_DOCS"))
 
-*PUT /api/v1/expenses/{expense_id}* (Update split type and shares)
-```json
-{
-  "split_type": "percentage",
-  "shares": {
-    "Alice": 50.0,
-    "Bob": 30.0,
-    "Charlie": 20.0
-  }
-}
-```
+# Create FastAPI app instance
+app = FastAPI(
+    title="Splitwise API",
+    description=(
+        (Path(__file__).parent / "docs" / "description.md").read_text()
+        if ENABLE_DOCS
+        else "Expense sharing and bill splitting API."
+    ),
+    version="1.0.0",
+    docs_url="/docs" if ENABLE_DOCS else None,
+    redoc_url="/redoc" if ENABLE_DOCS else None,
+    openapi_url="/openapi.json" if ENABLE_DOCS else None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
 
-*PUT /api/v1/expenses/{expense_id}* (Update category only)
-```json
-{
-  "category": "Dining"
-}
-```
+# Serve /openapi.json from bytes serialized once at startup
+_openapi_body = b""
+if ENABLE_DOCS:
+    app.router.routes[:] = [
+        route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url
+    ]
 
-*DELETE /api/v1/expenses/{expense_id}*
-- No request body required. Just call the endpoint with the correct `expense_id` in the URL.
+    @app.get(app.openapi_url, include_in_schema=False)
+    async def openapi_json():
+        """Cached OpenAPI schema"""
+        return Response(content=_openapi_body, media_type="application/json")
 
-**Common Error Cases:**
-- 422 Unprocessable Entity: Your request body is missing required fields, has wrong types, or fails validation (see error details in response).
-- 400 Bad Request: Business logic error (e.g., `paid_by` not in `participants`, shares do not sum correctly).
-- 404 Not Found: Resource does not exist.
-- 500 Internal Server Error: Unexpected server error.
+class FastCORS(CORSMiddleware):
+    """CORSMiddleware that passes requests without an Origin header straight through"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(name == b"origin" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+    
+    def is_allowed_origin(self, origin: str) -> bool:
+        """Exact origins first, then ALLOWED_ORIGIN_REGEX (re2 when available)"""
+        return origin in self.allow_origins or ALLOWED_ORIGIN_REGEX.fullmatch(origin) is not None
 
-**If you get a 422 error:**
-- Check the error response for the exact field and reason.
-- Make sure your JSON matches the schema and all requirements above.
-- Example error:
-    ```json
-    {
-      "detail": [
-        {
-          "loc": ["body", "amount"],
-          "msg": "field required",
-          "type": "value_error.missing"
-        }
-      ]
-    }
-    ```
-- For more help, see the schema in `/docs` or `/openapi.json`.
-""",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
+# Origins matched by pattern rather than listed exactly
+ALLOWED_ORIGIN_REGEX = origin_re.compile(
+    r"^(https://[^/]+\.(vercel|netlify)\.app|https://[^/]+\.onrender\.com|http://(localhost|127\.0\.0\.1):\d+)$"
 )
 
 # Add CORS middleware for frontend development and production
 app.add_middleware(
-    CORSMiddleware,
+    FastCORS,
     allow_origins=[
         "http://localhost:3000",  # React default
         "http://localhost:8080",  # Vue default
@@ -161,45 +155,60 @@ app.add_middleware(
         "http://127.0.0.1:3000",
         "http://127.0.0.1:8080",
         "http://127.0.0.1:5173",
-        # Production frontend domains
-        "https://*.vercel.app",
-        "https://*.netlify.app",
-        "https://*.onrender.com",
     ],
-    allow_origin_regex=r"https://.*\\.vercel\\.app|https://.*\\.netlify\\.app|https://.*\\.onrender\\.com|http://localhost:\\d+|http://127.0.0.1:\\d+",
+    # Production frontend domains and any local port
+    allow_origin_regex=ALLOWED_ORIGIN_REGEX.pattern,
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=("GET", "POST", "PUT", "DELETE", "OPTIONS"),
     allow_headers=["*"],
 )
 
 # Include all routes from routes.py
 app.include_router(router, prefix="/api/v1", tags=["expenses"])
 
+# Error and info bodies only point at the docs when they are actually served
+_DOCS_LINK = {"docs": "/docs"} if ENABLE_DOCS else {}
+
+# Bodies that never change are serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "message": "Welcome to Splitwise API",
+    "version": "1.0.0",
+    **_DOCS_LINK,
+    "status": "running"
+})
+_HEALTHY_BODY = orjson.dumps({
+    "status": "healthy",
+    "database": "connected",
+    "message": "All systems operational"
+})
+_INTERNAL_ERROR_BODY = orjson.dumps({
+    "success": False,
+    "message": "Internal server error",
+    "data": None
+})
+# 404 body is split around the request path, the only part that varies
+_NOT_FOUND_PREFIX, _NOT_FOUND_SUFFIX = orjson.dumps({
+    "error": "Not Found",
+    "message": "The endpoint {path} was not found",
+    **_DOCS_LINK
+}).split(b"{path}")
+
 # Root endpoint
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
-    return {
-        "message": "Welcome to Splitwise API",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "status": "running"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     try:
-        db_healthy = await test_connection()
+        db_healthy = await cached_test_connection()
         if db_healthy:
-            return {
-                "status": "healthy",
-                "database": "connected",
-                "message": "All systems operational"
-            }
+            return Response(content=_HEALTHY_BODY, media_type="application/json")
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={
                     "status": "unhealthy",
@@ -209,7 +218,7 @@ async def health_check():
             )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
@@ -218,80 +227,80 @@ async def health_check():
             }
         )
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Application startup event"""
-    logger.info("🚀 Splitwise API is starting up...")
-    try:
-        db_connected = await test_connection()
-        if db_connected:
-            logger.info("✅ Database connection established")
-        else:
-            logger.warning("⚠️ Database connection failed during startup")
-        # Create tables on startup
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("✅ Database tables created or already exist.")
-    except Exception as e:
-        logger.error(f"❌ Database connection error during startup: {e}")
-    logger.info("🎉 Splitwise API startup complete!")
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Application shutdown event"""
-    logger.info("🛑 Splitwise API is shutting down...")
-    logger.info("👋 Goodbye!")
+# Connection pool status, for spotting pool saturation
+@app.get("/debug/pool", include_in_schema=False)
+async def pool_status():
+    """Report the database connection pool status"""
+    pool = engine.pool
+    return {
+        "status": pool.status(),
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checked_in": pool.checkedin()
+    }
 
 # Exception handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
     """Custom 404 handler"""
-    return JSONResponse(
+    path = orjson.dumps(request.url.path)[1:-1]
+    return Response(
+        content=_NOT_FOUND_PREFIX + path + _NOT_FOUND_SUFFIX,
         status_code=404,
-        content={
-            "error": "Not Found",
-            "message": f"The endpoint {request.url.path} was not found",
-            "docs": "/docs"
-        }
+        media_type="application/json"
     )
 
-@app.exception_handler(500)
-async def internal_error_handler(request, exc):
-    """Custom 500 handler"""
-    logger.error(f"Internal server error: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={
-            "error": "Internal Server Error",
-            "message": "An unexpected error occurred",
-            "docs": "/docs"
-        }
+@app.exception_handler(ValueError)
+async def value_error_handler(request: Request, exc: ValueError):
+    """Business rule violations raised by crud, in the API's response envelope"""
+    return ORJSONResponse(
+        status_code=400,
+        content={"success": False, "message": f"Validation error: {exc}", "data": None}
     )
 
+@app.exception_handler(Exception)
+async def internal_error_handler(request: Request, exc: Exception):
+    """Any other unhandled error, in the API's response envelope"""
+    logger.error("Internal server error: %s", exc)
+    return Response(content=_INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Custom handler for 422 Unprocessable Entity errors with detailed feedback."""
     logger.warning(f"Validation error at {request.url}: {exc.errors()}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": "Validation Error",
             "message": "Your request did not match the required schema. See 'details' for more information.",
             "details": exc.errors(),
             "body": exc.body,
-            "docs": "/docs"
+            **_DOCS_LINK
         }
     )
 
-# Main entry point for local development only
+# Main entry point when run directly (python -m app.main)
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
+    # Scale out only when Redis is there to share the response cache across workers;
+    # each worker opens its own pool, so cap workers relative to the pool size
+    default_workers = max(1, min(os.cpu_count() or 1, DB_POOL_SIZE // 4)) if os.environ.get("REDIS_URL") else 1
+    workers = int(os.environ.get("WEB_CONCURRENCY", default_workers))
+    if workers == 1:
+        # uvicorn serves from this same process, so its own response cache can never go stale
+        import app.cache as response_cache
+        response_cache.LOCAL_ENABLED = True
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
-        reload=False
+        reload=False,
+        access_log=False,
+        log_level="warning",
+        loop="auto",  # uvloop when installed
+        http="auto",  # httptools when installed
+        workers=workers,
+        backlog=2048  # Absorb connection bursts
     )
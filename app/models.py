@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, JSON, Enum as SQLEnum, CheckConstraint
+from sqlalchemy import Column, Integer, BigInteger, Numeric, String, DateTime, Enum as SQLEnum, CheckConstraint, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
 
-class SplitType(enum.Enum):
+class SplitType(str, enum.Enum):
     equal = "equal"
     percentage = "percentage"
     exact = "exact"
@@ -12,19 +13,82 @@ class Expense(Base):
     __tablename__ = "expenses"
     
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
     description = Column(String, nullable=False)
     paid_by = Column(String, nullable=False)
-    participants = Column(JSON, nullable=False)  # List of participant names
+    participants = Column(JSONB, nullable=False)  # List of participant names
     split_type = Column(SQLEnum(SplitType), nullable=False, default=SplitType.equal)
-    shares = Column(JSON, nullable=True)  # Dict of {participant: amount/percentage}
+    shares = Column(JSONB, nullable=True)  # Dict of {participant: amount/percentage}
     category = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
-    # Add constraint to ensure amount is positive
+    # Add constraint to ensure amount is positive, plus indexes for per-person lookups
     __table_args__ = (
         CheckConstraint('amount > 0', name='positive_amount'),
+        Index('ix_expense_paid_by_created', 'paid_by', 'created_at'),
+        Index('ix_expense_created_at', 'created_at'),
+        Index('ix_expense_participants_gin', 'participants', postgresql_using='gin'),
     )
     
+    @property
+    def amount_cents(self) -> int:
+        """Amount as integer cents"""
+        return round(self.amount * 100)
+    
     def __repr__(self):
         return f"<Expense(id={self.id}, description='{self.description}', amount={self.amount}, paid_by='{self.paid_by}')>"
+
+class PersonBalance(Base):
+    __tablename__ = "person_balances"
+    
+    person = Column(String, primary_key=True)
+    spent_cents = Column(BigInteger, nullable=False, default=0)
+    owed_cents = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)  # Number of expenses this person appears in
+    
+    def __repr__(self):
+        return f"<PersonBalance(person='{self.person}', spent_cents={self.spent_cents}, owed_cents={self.owed_cents})>"
+
+class DataMigration(Base):
+    __tablename__ = "data_migrations"
+    
+    name = Column(String, primary_key=True)  # One row per one-off data migration that has completed
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<DataMigration(name='{self.name}', applied_at={self.applied_at})>"
+
+
+# DDL for changes made after the tables were first created; create_all() skips existing tables
+SCHEMA_UPGRADES = [
+    "ALTER TABLE expenses ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()",
+    """
+    DO $$ BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'expenses' AND column_name = 'participants') = 'json' THEN
+            ALTER TABLE expenses ALTER COLUMN participants TYPE JSONB USING participants::jsonb;
+        END IF;
+    END $$
+    """,
+    """
+    DO $$ BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'expenses' AND column_name = 'amount') = 'double precision' THEN
+            ALTER TABLE expenses ALTER COLUMN amount TYPE NUMERIC(12, 2) USING round(amount::numeric, 2);
+        END IF;
+    END $$
+    """,
+    """
+    DO $$ BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'expenses' AND column_name = 'shares') = 'json' THEN
+            ALTER TABLE expenses ALTER COLUMN shares TYPE JSONB USING shares::jsonb;
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_expense_paid_by_created ON expenses (paid_by, created_at)",
+    "DROP INDEX IF EXISTS ix_expense_paid_by",
+    "CREATE INDEX IF NOT EXISTS ix_expense_created_at ON expenses (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_expense_participants_gin ON expenses USING gin (participants)",
+]
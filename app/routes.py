@@ -1,231 +1,265 @@
-from fastapi import APIRouter, Depends, HTTPException
+from __future__ import annotations
+
+import hashlib
+import logging
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
 
-from app.database import get_db, test_connection
+from app.database import get_db, cached_test_connection, AsyncSessionLocal
 from app.schemas import (
     CreateExpense, UpdateExpense, ExpenseResponse,
     BalanceSummary, SettlementTransaction, PeopleList, ApiResponse
 )
 import app.crud as crud
+import app.cache as cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Aggregate responses are cached briefly and dropped on every expense write
+_AGGREGATE_CACHE_TTL = 30
+_AGGREGATE_KEYS = ("balances", "settlements", "people")
+# The people set changes far less often than balances
+_PEOPLE_CACHE_TTL = 300
+
+def _ok(message: str, data=None) -> ORJSONResponse:
+    """Success envelope"""
+    return ORJSONResponse({"success": True, "message": message, "data": data})
+
+def _error(message: str, data=None) -> ORJSONResponse:
+    """Failure envelope"""
+    return ORJSONResponse({"success": False, "message": message, "data": data})
+
+def _conditional_json(request: Request, body: bytes) -> Response:
+    """JSON response tagged with a content hash; 304 with no body if the client already has it"""
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+async def _cached_response(request: Request, key: str) -> Tuple[Optional[Response], Optional[int]]:
+    """
+    Return the cached JSON body for key as a response, if there is one, and the cache
+    generation to hand to _cache_response once the payload has been computed.
+    """
+    body, generation = await cache.get(key)
+    if body is None:
+        return None, generation
+    return _conditional_json(request, body), generation
+
+async def _cache_response(request: Request, key: str, payload: dict, generation: Optional[int],
+                          ttl: int = _AGGREGATE_CACHE_TTL) -> Response:
+    """Serialize payload once, cache the bytes (unless a write invalidated key meanwhile) and return them"""
+    body = orjson.dumps(payload)
+    await cache.put(key, body, ttl, generation)
+    await cache.put_stale(key, body)
+    return _conditional_json(request, body)
+
+async def _stale_response(key: str) -> Optional[Response]:
+    """Last good body for key, marked stale, for when the database cannot be reached"""
+    body = await cache.get_stale(key)
+    if body is None:
+        return None
+    logger.warning("Serving stale %s after a database error", key)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Warning": '110 - "Response is Stale"'}
+    )
+
 # Health check endpoint
-@router.get("/health", response_model=ApiResponse)
+@router.get("/health", response_model=ApiResponse[Dict[str, str]])
 async def health_check():
     """Check database connection health"""
     try:
-        is_connected = await test_connection()
+        is_connected = await cached_test_connection()
         if is_connected:
-            return ApiResponse(
-                success=True,
-                message="Database connection successful",
-                data={"status": "healthy"}
-            )
+            return _ok("Database connection successful", {"status": "healthy"})
         else:
-            return ApiResponse(
-                success=False,
-                message="Database connection failed",
-                data={"status": "unhealthy"}
-            )
+            return _error("Database connection failed", {"status": "unhealthy"})
     except Exception as e:
-        return ApiResponse(
-            success=False,
-            message=f"Health check error: {str(e)}",
-            data={"status": "error"}
-        )
+        return _error(f"Health check error: {str(e)}", {"status": "error"})
+
+# Serialized expenses keyed by (id, updated_at); an update changes updated_at, so stale entries are never hit
+_SERIALIZED_CACHE_SIZE = 8192
+_serialized_expenses: "OrderedDict[tuple, dict]" = OrderedDict()
 
 # Expense endpoints
 def serialize_expense(expense) -> dict:
-    """Convert SQLAlchemy Expense object to serializable dictionary"""
-    return {
+    """Convert SQLAlchemy Expense object to serializable dictionary (shared, do not mutate)"""
+    key = (expense.id, expense.updated_at or expense.created_at)
+    cached = _serialized_expenses.get(key)
+    if cached is not None:
+        _serialized_expenses.move_to_end(key)
+        return cached
+    
+    data = {
         "id": expense.id,
-        "amount": expense.amount,
+        "amount": float(expense.amount),
         "description": expense.description,
         "paid_by": expense.paid_by,
         "participants": expense.participants,
         "split_type": expense.split_type.value,
         "shares": expense.shares,
         "category": expense.category,
-        "created_at": expense.created_at.isoformat() if expense.created_at else None
+        "created_at": expense.created_at  # orjson writes datetimes as RFC 3339
     }
+    _serialized_expenses[key] = data
+    if len(_serialized_expenses) > _SERIALIZED_CACHE_SIZE:
+        _serialized_expenses.popitem(last=False)
+    return data
 
-@router.post("/expenses", response_model=ApiResponse)
+@router.post("/expenses", response_model=ApiResponse[ExpenseResponse])
 async def create_expense(expense: CreateExpense, db: AsyncSession = Depends(get_db)):
     """Create a new expense"""
+    created_expense = await crud.create_expense(expense, db)
+    await cache.invalidate(*_AGGREGATE_KEYS)
+    return _ok("Expense created successfully", serialize_expense(created_expense))
+
+@router.get("/expenses", response_model=ApiResponse[List[ExpenseResponse]])
+async def get_expenses():
+    """Get all expenses, written out as rows arrive from the database"""
+    # The rows are read after this function returns, so the session belongs to the response body
+    # rather than get_db, whose teardown timing relative to streaming differs across FastAPI versions
+    db = AsyncSessionLocal()
+    expenses = crud.stream_all_expenses(db)
     try:
-        created_expense = await crud.create_expense(expense, db)
-        return ApiResponse(
-            success=True,
-            message="Expense created successfully",
-            data=serialize_expense(created_expense)
-        )
-    except ValueError as e:
-        return ApiResponse(
-            success=False,
-            message=f"Validation error: {str(e)}",
-            data=None
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
-
-@router.get("/expenses", response_model=ApiResponse)
-async def get_expenses(db: AsyncSession = Depends(get_db)):
-    """Get all expenses"""
-    try:
-        expenses = await crud.get_all_expenses(db)
-        expense_data = [serialize_expense(expense) for expense in expenses]
-        
-        return ApiResponse(
-            success=True,
-            message=f"Retrieved {len(expenses)} expenses",
-            data=expense_data
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
+        # Fetch the first batch up front so connection errors reach the app's exception handlers
+        first = await anext(expenses, None)
+    except BaseException:
+        await expenses.aclose()
+        await db.close()
+        raise
+    
+    async def body():
+        try:
+            # "success" goes last so a failure mid-stream can still report it
+            yield b'{"data":['
+            count = 0
+            success = True
+            try:
+                if first is not None:
+                    yield orjson.dumps(serialize_expense(first))
+                    count = 1
+                    async for expense in expenses:
+                        yield b"," + orjson.dumps(serialize_expense(expense))
+                        count += 1
+                message = f"Retrieved {count} expenses"
+            except Exception as e:
+                logger.error("Error streaming expenses: %s", e)
+                success = False
+                message = "Internal server error"
+            yield b'],"message":' + orjson.dumps(message) + b',"success":' + orjson.dumps(success) + b'}'
+        finally:
+            # Also runs when the client disconnects mid-stream
+            await expenses.aclose()
+            await db.close()
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+# Declared before /expenses/{expense_id} so "version" is not parsed as an id
+@router.get("/expenses/version", response_model=ApiResponse[Dict[str, str]])
+async def get_expenses_version(db: AsyncSession = Depends(get_db)):
+    """Fingerprint that changes whenever any expense is added, updated or deleted"""
+    version = await crud.get_expenses_version(db)
+    return _ok("Expenses version retrieved", {"version": version})
 
-@router.get("/expenses/{expense_id}", response_model=ApiResponse)
+@router.get("/expenses/{expense_id}", response_model=ApiResponse[ExpenseResponse])
 async def get_expense(expense_id: int, db: AsyncSession = Depends(get_db)):
     """Get expense by ID"""
-    try:
-        expense = await crud.get_expense_by_id(expense_id, db)
-        if not expense:
-            return ApiResponse(
-                success=False,
-                message="Expense not found",
-                data=None
-            )
-        
-        return ApiResponse(
-            success=True,
-            message="Expense retrieved successfully",
-            data=serialize_expense(expense)
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
+    expense = await crud.get_expense_by_id(expense_id, db)
+    if not expense:
+        return _error("Expense not found")
+    
+    return _ok("Expense retrieved successfully", serialize_expense(expense))
 
-@router.put("/expenses/{expense_id}", response_model=ApiResponse)
+@router.put("/expenses/{expense_id}", response_model=ApiResponse[ExpenseResponse])
 async def update_expense(expense_id: int, expense_data: UpdateExpense, db: AsyncSession = Depends(get_db)):
     """Update an expense"""
-    try:
-        expense = await crud.update_expense(expense_id, expense_data, db)
-        if not expense:
-            return ApiResponse(
-                success=False,
-                message="Expense not found",
-                data=None
-            )
-        
-        return ApiResponse(
-            success=True,
-            message="Expense updated successfully",
-            data=serialize_expense(expense)
-        )
-    except ValueError as e:
-        return ApiResponse(
-            success=False,
-            message=f"Validation error: {str(e)}",
-            data=None
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
+    expense = await crud.update_expense(expense_id, expense_data, db)
+    await cache.invalidate(*_AGGREGATE_KEYS)
+    if not expense:
+        return _error("Expense not found")
+    
+    return _ok("Expense updated successfully", serialize_expense(expense))
 
-@router.delete("/expenses/{expense_id}", response_model=ApiResponse)
+@router.delete("/expenses/{expense_id}", response_model=ApiResponse[Dict[str, int]])
 async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_db)):
     """Delete an expense"""
-    try:
-        deleted = await crud.delete_expense(expense_id, db)
-        if not deleted:
-            return ApiResponse(
-                success=False,
-                message="Expense not found",
-                data=None
-            )
-        
-        return ApiResponse(
-            success=True,
-            message="Expense deleted successfully",
-            data={"deleted_id": expense_id}
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
+    deleted = await crud.delete_expense(expense_id, db)
+    await cache.invalidate(*_AGGREGATE_KEYS)
+    if not deleted:
+        return _error("Expense not found")
+    
+    return _ok("Expense deleted successfully", {"deleted_id": expense_id})
 
 # Financial endpoints
-@router.get("/balances", response_model=ApiResponse)
-async def get_balances(db: AsyncSession = Depends(get_db)):
+@router.get("/balances", response_model=ApiResponse[List[BalanceSummary]])
+async def get_balances(request: Request, db: AsyncSession = Depends(get_db)):
     """Get balance summary for all people"""
+    cached, generation = await _cached_response(request, "balances")
+    if cached is not None:
+        return cached
     try:
         balances = await crud.calculate_balances(db)
-        if not balances:
-            return ApiResponse(
-                success=True,
-                message="No expenses found",
-                data=[]
-            )
-        
-        return ApiResponse(
-            success=True,
-            message=f"Retrieved balances for {len(balances)} people",
-            data=balances
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
-
-@router.get("/settlements", response_model=ApiResponse)
-async def get_settlements(db: AsyncSession = Depends(get_db)):
+    except (SQLAlchemyError, OSError):
+        stale = await _stale_response("balances")
+        if stale is None:
+            raise
+        return stale
+    if not balances:
+        return await _cache_response(request, "balances", {
+            "success": True,
+            "message": "No expenses found",
+            "data": []
+        }, generation)
+    
+    return await _cache_response(request, "balances", {
+        "success": True,
+        "message": f"Retrieved balances for {len(balances)} people",
+        "data": balances
+    }, generation)
+
+@router.get("/settlements", response_model=ApiResponse[List[SettlementTransaction]])
+async def get_settlements(request: Request, db: AsyncSession = Depends(get_db)):
     """Get simplified settlement transactions"""
+    cached, generation = await _cached_response(request, "settlements")
+    if cached is not None:
+        return cached
     try:
         settlements = await crud.calculate_settlements(db)
-        return ApiResponse(
-            success=True,
-            message=f"Retrieved {len(settlements)} settlements",
-            data=settlements
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
-
-@router.get("/people", response_model=ApiResponse)
-async def get_people(db: AsyncSession = Depends(get_db)):
+    except (SQLAlchemyError, OSError):
+        stale = await _stale_response("settlements")
+        if stale is None:
+            raise
+        return stale
+    return await _cache_response(request, "settlements", {
+        "success": True,
+        "message": f"Retrieved {len(settlements)} settlements",
+        "data": settlements
+    }, generation)
+
+@router.get("/people", response_model=ApiResponse[PeopleList])
+async def get_people(request: Request, db: AsyncSession = Depends(get_db)):
     """Get all people who have participated in expenses"""
+    cached, generation = await _cached_response(request, "people")
+    if cached is not None:
+        return cached
     try:
         people = await crud.get_all_people(db)
-        return ApiResponse(
-            success=True,
-            message=f"Retrieved {len(people)} people",
-            data={"people": people}
-        )
-    except Exception as e:
-        return ApiResponse(
-            success=False,
-            message="Internal server error",
-            data=None
-        )
+    except (SQLAlchemyError, OSError):
+        stale = await _stale_response("people")
+        if stale is None:
+            raise
+        return stale
+    return await _cache_response(request, "people", {
+        "success": True,
+        "message": f"Retrieved {len(people)} people",
+        "data": {"people": people}
+    }, generation, ttl=_PEOPLE_CACHE_TTL)
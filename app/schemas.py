@@ -1,6 +1,21 @@
-from pydantic import BaseModel, validator, Field
-from typing import List, Optional, Dict, Literal, Any, Union
+from pydantic import BaseModel, ConfigDict, validator, model_validator, Field
+from typing import List, Optional, Dict, Literal, Generic, TypeVar
 from datetime import datetime
+import math
+
+def _check_percentage_total(total: float, amount: float) -> None:
+    if abs(total - 100) > 0.01:  # Allow small floating point errors
+        raise ValueError(f'Percentages must sum to 100, got {total}')
+
+def _check_exact_total(total: float, amount: float) -> None:
+    if abs(total - amount) > 0.01:  # Allow small floating point errors
+        raise ValueError(f'Exact shares must sum to total amount {amount}, got {total}')
+
+# Split type -> check on the sum of the shares
+_SHARE_TOTAL_CHECKS = {
+    'percentage': _check_percentage_total,
+    'exact': _check_exact_total,
+}
 
 class BaseExpense(BaseModel):
     amount: float = Field(..., gt=0, description="Amount must be positive")
@@ -16,60 +31,35 @@ class BaseExpense(BaseModel):
         if not v or any(not participant.strip() for participant in v):
             raise ValueError('All participants must have non-empty names')
         # Remove duplicates while preserving order
-        seen = set()
-        unique_participants = []
-        for participant in v:
-            if participant not in seen:
-                seen.add(participant)
-                unique_participants.append(participant)
-        return unique_participants
+        return list(dict.fromkeys(v))
     
-    @validator('paid_by')
-    def paid_by_in_participants(cls, v, values):
-        if 'participants' in values and v not in values['participants']:
+    @model_validator(mode='after')
+    def validate_payer_and_shares(self):
+        # Runs once all fields are valid, so the participant set is built a single time
+        participant_set = frozenset(self.participants)
+        if self.paid_by not in participant_set:
             raise ValueError('paid_by must be one of the participants')
-        return v
-    
-    @validator('shares')
-    def validate_shares(cls, v, values):
-        if 'split_type' not in values or 'participants' not in values:
-            return v
-            
-        split_type = values['split_type']
-        participants = values['participants']
         
-        if split_type == 'equal':
-            if v is not None:
+        shares = self.shares
+        if self.split_type == 'equal':
+            if shares is not None:
                 raise ValueError('shares should not be provided for equal split')
-            return v
+            return self
+        
+        if shares is None:
+            raise ValueError(f'shares must be provided for {self.split_type} split')
         
-        if split_type in ['percentage', 'exact']:
-            if v is None:
-                raise ValueError(f'shares must be provided for {split_type} split')
-            
-            # Check if all participants have shares
-            missing_participants = set(participants) - set(v.keys())
+        # Common case: shares cover exactly the participants, a single set comparison
+        keys = shares.keys()
+        if keys != participant_set:
+            missing_participants = [p for p in participant_set if p not in keys]
             if missing_participants:
-                raise ValueError(f'Missing shares for participants: {missing_participants}')
-            
-            # Check if there are extra participants in shares
-            extra_participants = set(v.keys()) - set(participants)
-            if extra_participants:
-                raise ValueError(f'Shares provided for non-participants: {extra_participants}')
-            
-            # For percentage split, check if percentages sum to 100
-            if split_type == 'percentage':
-                total_percentage = sum(v.values())
-                if abs(total_percentage - 100) > 0.01:  # Allow small floating point errors
-                    raise ValueError(f'Percentages must sum to 100, got {total_percentage}')
-            
-            # For exact split, check if amounts sum to total amount
-            if split_type == 'exact' and 'amount' in values:
-                total_shares = sum(v.values())
-                if abs(total_shares - values['amount']) > 0.01:  # Allow small floating point errors
-                    raise ValueError(f'Exact shares must sum to total amount {values["amount"]}, got {total_shares}')
+                raise ValueError(f'Missing shares for participants: {set(missing_participants)}')
+            extra_participants = [k for k in keys if k not in participant_set]
+            raise ValueError(f'Shares provided for non-participants: {set(extra_participants)}')
         
-        return v
+        _SHARE_TOTAL_CHECKS[self.split_type](math.fsum(shares.values()), self.amount)
+        return self
 
 class CreateExpense(BaseModel):
     amount: float = Field(..., gt=0, description="Amount must be positive")
@@ -86,13 +76,7 @@ class CreateExpense(BaseModel):
             if not v or any(not participant.strip() for participant in v):
                 raise ValueError('All participants must have non-empty names')
             # Remove duplicates while preserving order
-            seen = set()
-            unique_participants = []
-            for participant in v:
-                if participant not in seen:
-                    seen.add(participant)
-                    unique_participants.append(participant)
-            return unique_participants
+            return list(dict.fromkeys(v))
         return v
 
 class UpdateExpense(BaseModel):
@@ -122,8 +106,7 @@ class ExpenseResponse(BaseExpense):
             return v.value
         return v
     
-    class Config:
-        from_attributes = True  # SQLAlchemy 2.x style (replaces orm_mode)
+    model_config = ConfigDict(from_attributes=True)  # Read straight from SQLAlchemy rows
 
 class BalanceSummary(BaseModel):
     person: str
@@ -136,14 +119,15 @@ class SettlementTransaction(BaseModel):
     to: str
     amount: float
     
-    class Config:
-        populate_by_name = True  # Pydantic v2 style (replaces allow_population_by_field_name)
+    model_config = ConfigDict(populate_by_name=True)  # Accept field names as well as aliases
 
 class PeopleList(BaseModel):
     people: List[str]
 
 # API Response wrapper models
-class ApiResponse(BaseModel):
+T = TypeVar("T")
+
+class ApiResponse(BaseModel, Generic[T]):
     success: bool
     message: str
-    data: Optional[Union[Dict[str, Any], List[Any], str, int, float]] = None
+    data: Optional[T] = None
@@ -1,9 +1,71 @@
 import streamlit as st
+import concurrent.futures
+import html
+import math
+import os
+import socket
+import threading
+import orjson
 import requests
-import pandas as pd
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util import Retry
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import Dict, List, Optional, Tuple
 
 BACKEND_URL = "https://splitwise-pzwt.onrender.com/api/v1"
+# Mirrors the backend setting; /docs only exists when the backend is started with it
+ENABLE_DOCS = bool(os.environ.get("ENABLE_DOCS"))
+
+# TCP keepalive so idle pooled connections are not silently dropped between clicks;
+# the idle/interval knobs only exist on some platforms (e.g. Linux)
+_KEEPALIVE_OPTIONS = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    _KEEPALIVE_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30))
+if hasattr(socket, "TCP_KEEPINTVL"):
+    _KEEPALIVE_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10))
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections use TCP keepalive"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + _KEEPALIVE_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+# Streamlit re-executes this script on every rerun, so anything that must outlive a run
+# (connection pools, caches, threads) is created through st.cache_resource
+@st.cache_resource
+def _get_session() -> requests.Session:
+    """One pooled session per server process, shared by all reruns and users"""
+    adapter = KeepAliveAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        # Retry throttling and gateway errors (e.g. a sleeping Render instance). POST is left
+        # out: a retried create whose first response was lost would add the expense twice
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=frozenset(["GET", "PUT", "DELETE"]),
+            raise_on_status=False
+        )
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+    return session
+
+# (connect, read) timeouts in seconds
+_TIMEOUT = (3.05, 10)
+# Radio labels for each split type
+_SPLIT_LABELS = {
+    "equal": "Equal Split",
+    "percentage": "Percentage Split",
+    "exact": "Exact Amount Split"
+}
+# Expense cards per page in the history tab
+_HISTORY_PAGE_SIZE = 25
 
 st.set_page_config(
     page_title="SplitEase",
@@ -12,7 +74,7 @@ st.set_page_config(
 )
 
 # Dark theme CSS
-st.markdown("""
+_CSS = """
 <style>
 body, .stApp { background: #181c20 !important; color: #f3f4f6 !important; }
 .section-header { font-size: 1.3rem; font-weight: 600; margin-top: 1.5em; margin-bottom: 0.5em; color: #f3f4f6; }
@@ -27,7 +89,18 @@ input, select, textarea, .stTextInput > div > input, .stNumberInput > div > inpu
 .validation-error { color: #ff6b6b; font-size: 0.9em; margin-top: 0.2em; }
 .validation-success { color: #51cf66; font-size: 0.9em; margin-top: 0.2em; }
 </style>
-""", unsafe_allow_html=True)
+"""
+# Streamlit drops any element a rerun does not emit, so the style block is sent every run
+st.markdown(_CSS, unsafe_allow_html=True)
+
+@st.cache_data(show_spinner=False)
+def _section_html(label: str, small: bool) -> str:
+    style = " style='font-size:1.1em;'" if small else ""
+    return f"<div class='section-header'{style}>{label}</div>"
+
+def section(label: str, small: bool = False) -> None:
+    """Render a section header; small for sub-sections inside a tab"""
+    st.markdown(_section_html(label, small), unsafe_allow_html=True)
 
 # Initialize session state
 if 'people_list' not in st.session_state:
@@ -35,26 +108,44 @@ if 'people_list' not in st.session_state:
 if 'expenses_data' not in st.session_state:
     st.session_state.expenses_data = []
 
+@st.cache_resource
+def _conditional_cache() -> Dict[str, tuple]:
+    """Last ETag and parsed body per GET endpoint the backend tags (balances, settlements, people); survives reruns"""
+    return {}
+
 def make_api_request(endpoint: str, method: str = "GET", data: Dict = None) -> Dict:
     """Make API request with proper error handling"""
     try:
         url = f"{BACKEND_URL}{endpoint}"
-        headers = {"Content-Type": "application/json"}
-        
-        if method == "GET":
-            response = requests.get(url, timeout=10)
-        elif method == "POST":
-            response = requests.post(url, json=data, headers=headers, timeout=10)
-        elif method == "PUT":
-            response = requests.put(url, json=data, headers=headers, timeout=10)
-        elif method == "DELETE":
-            response = requests.delete(url, timeout=10)
+        # Conditional GET: if the body is unchanged the backend answers 304 and the last parsed body is reused
+        cached = _conditional_cache().get(endpoint) if method == "GET" else None
+        response = _get_session().request(
+            method,
+            url,
+            # The session already sends Content-Type: application/json
+            data=orjson.dumps(data) if method in ("POST", "PUT") else None,
+            headers={"If-None-Match": cached[0]} if cached else None,
+            timeout=_TIMEOUT
+        )
+        if response.status_code == 304 and cached:
+            return cached[1]
         
+        # Error statuses still carry the API's {"success": False, "message": ...} envelope
+        if not response.ok:
+            try:
+                error_json = orjson.loads(response.content)
+            except ValueError:  # orjson.JSONDecodeError is a ValueError
+                error_json = None
+            if isinstance(error_json, dict) and 'success' in error_json:
+                return error_json
         response.raise_for_status()
-        resp_json = response.json()
+        resp_json = orjson.loads(response.content)
         
         # Handle different response formats
         if isinstance(resp_json, dict) and 'success' in resp_json:
+            etag = response.headers.get("ETag")
+            if method == "GET" and etag:
+                _conditional_cache()[endpoint] = (etag, resp_json)
             return resp_json
         elif isinstance(resp_json, list):
             return {"success": True, "data": resp_json}
@@ -66,7 +157,9 @@ def make_api_request(endpoint: str, method: str = "GET", data: Dict = None) -> D
     except Exception as e:
         return {"success": False, "message": f"Error: {str(e)}", "data": None}
 
-@st.cache_data(ttl=30)
+# People and expenses only change through this app's writes, which clear the caches,
+# so the TTL is only a backstop for edits made elsewhere
+@st.cache_data(ttl=300, max_entries=4, show_spinner=False)
 def get_all_people() -> List[str]:
     """Get all people from backend with caching"""
     response = make_api_request("/people")
@@ -78,22 +171,131 @@ def get_all_people() -> List[str]:
             return people_data
     return []
 
-@st.cache_data(ttl=30)
-def get_all_expenses() -> List[Dict]:
-    """Get all expenses from backend with caching"""
+@st.cache_data(ttl=10, show_spinner=False)
+def _get_expenses_version() -> Optional[str]:
+    """Backend fingerprint of the expenses table; briefly cached so reruns don't each ask"""
+    response = make_api_request("/expenses/version")
+    if response.get("success") and response.get("data"):
+        return response["data"].get("version")
+    return None
+
+@st.cache_data(ttl=600, max_entries=4, show_spinner=False)
+def _fetch_expenses(version: Optional[str]) -> List[Dict]:
+    """Full expense list; cached per version, so it is only refetched when expenses change"""
     response = make_api_request("/expenses")
     if response.get("success") and response.get("data"):
         return response["data"]
     return []
 
+# Stands in for the version when get_all_expenses returns this session's patched list; never a backend version
+_LOCAL_VERSION = "local"
+
+def get_all_expenses() -> Tuple[Optional[str], List[Dict]]:
+    """
+    Get all expenses from backend with caching (call from the script thread; reads session state).
+    Returns (version, expenses), where version is the one the list was fetched under,
+    or _LOCAL_VERSION for this session's locally patched list.
+    """
+    version = _get_expenses_version()
+    # After this session's own update or delete, its locally patched list stands in for a refetch.
+    # It is pinned to the first version seen after the write and dropped once the version moves on.
+    local = st.session_state.get('_local_expenses')
+    if local is not None:
+        local_version, expenses = local
+        if local_version is None:
+            st.session_state['_local_expenses'] = (version, expenses)
+            return _LOCAL_VERSION, expenses
+        if local_version == version:
+            return _LOCAL_VERSION, expenses
+        del st.session_state['_local_expenses']
+    return version, _fetch_expenses(version)
+
+def _apply_local_expense_change(expense_id: int, updated: Optional[Dict]) -> None:
+    """Patch one updated (or, with None, deleted) expense into the current list instead of refetching every expense"""
+    _, expenses = get_all_expenses()
+    if updated is None:
+        patched = [e for e in expenses if e['id'] != expense_id]
+    else:
+        patched = [updated if e['id'] == expense_id else e for e in expenses]
+    st.session_state['_local_expenses'] = (None, patched)
+    # The people list and version are small; the version must be re-read to pin the patch to it
+    get_all_people.clear()
+    _get_expenses_version.clear()
+
+def _invalidate_expense_caches() -> None:
+    """Drop cached people and expenses after a write"""
+    get_all_people.clear()
+    _get_expenses_version.clear()
+    _fetch_expenses.clear()
+    _expense_facets.clear()
+    st.session_state.pop('_local_expenses', None)
+    st.session_state.pop('_local_facets', None)
+
+@st.cache_resource
+def _io_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Threads for independent backend calls, created once per process; requests releases the GIL while waiting on the network"""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+def _submit(fn, *args) -> concurrent.futures.Future:
+    """Run fn on the I/O pool under the calling script's context, which st.cache_data functions need"""
+    ctx = get_script_run_ctx()
+    
+    def run():
+        # Pool threads are shared by every session, so the context is attached per task
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+    
+    return _io_pool().submit(run)
+
+def _prefetch_people_and_expenses() -> tuple[List[str], Optional[str], List[Dict]]:
+    """Fetch people and expenses concurrently; returns (people, expenses version, expenses)"""
+    people_future = _submit(get_all_people)
+    # Expenses stay on the script thread, which get_all_expenses needs for session state
+    version, expenses = get_all_expenses()
+    return people_future.result(), version, expenses
+
+@st.cache_data(ttl=600, max_entries=4, show_spinner=False)
+def _expense_facets(version: Optional[str], _expenses: List[Dict]) -> Dict:
+    """Facets for the shared expense list fetched under version, derived once per version"""
+    return _build_expense_facets(_expenses)  # Underscored so st.cache_data keys on the version alone
+
+def _local_expense_facets(expenses: List[Dict]) -> Dict:
+    """Facets for this session's patched list, kept in session state since no other session has that list"""
+    cached = st.session_state.get('_local_facets')
+    if cached is None or cached[0] is not expenses:
+        cached = (expenses, _build_expense_facets(expenses))
+        st.session_state['_local_facets'] = cached
+    return cached[1]
+
+def _build_expense_facets(expenses: List[Dict]) -> Dict:
+    """History filter choices and a person -> expense positions index"""
+    by_person: Dict[str, List[int]] = {}
+    for i, exp in enumerate(expenses):
+        for person in dict.fromkeys((exp['paid_by'], *exp.get('participants', []))):
+            by_person.setdefault(person, []).append(i)
+    return {
+        "groups": get_all_groups(expenses),
+        "people_union": sorted(by_person),
+        "categories": sorted({exp.get('category') or 'Uncategorized' for exp in expenses}),
+        "by_person": by_person,
+        "indexed_count": len(expenses)
+    }
+
+def get_bootstrap() -> Dict:
+    """People, expenses and the history filter facets, each fetched or derived at most once per change"""
+    people, version, expenses = _prefetch_people_and_expenses()
+    # Keyed on the version the list was actually fetched under, never re-read
+    facets = _local_expense_facets(expenses) if version == _LOCAL_VERSION else _expense_facets(version, expenses)
+    return {"people": people, "expenses": expenses, **facets}
+
+@st.cache_data(ttl=30)
+def _get_all_groups_cached(group_names: tuple) -> List[str]:
+    """Unique non-empty groups, sorted; cached on the group column alone"""
+    return sorted({group for group in group_names if group})
+
 def get_all_groups(expenses: List[Dict]) -> List[str]:
     """Extract unique groups from expenses"""
-    groups = set()
-    for exp in expenses:
-        group = exp.get('group')
-        if group and group.strip():
-            groups.add(group.strip())
-    return sorted(list(groups))
+    return _get_all_groups_cached(tuple((exp.get('group') or '').strip() for exp in expenses))
 
 def validate_split_shares(split_type: str, shares: Dict[str, float], participants: List[str], amount: float) -> tuple[bool, str]:
     """Validate split shares based on type"""
@@ -104,31 +306,135 @@ def validate_split_shares(split_type: str, shares: Dict[str, float], participant
         return False, f"Shares required for {split_type} split"
     
     # Check all participants have shares
-    missing = set(participants) - set(shares.keys())
+    missing = [p for p in participants if p not in shares]
     if missing:
         return False, f"Missing shares for: {', '.join(missing)}"
     
     if split_type == "percentage":
-        total = sum(shares.values())
+        total = math.fsum(shares.values())
         if abs(total - 100) > 0.01:
             return False, f"Percentages must sum to 100% (currently {total:.1f}%)"
         return True, f"Percentages sum to {total:.1f}% ✓"
     
     elif split_type == "exact":
-        total = sum(shares.values())
+        total = math.fsum(shares.values())
         if abs(total - amount) > 0.01:
             return False, f"Exact amounts must sum to ₹{amount:.2f} (currently ₹{total:.2f})"
         return True, f"Exact amounts sum to ₹{total:.2f} ✓"
     
     return True, ""
 
+def _share_input(participant: str, split_type: str, equal_share: float,
+                 current_shares: Optional[Dict[str, float]], key: str) -> float:
+    """One share input, a percentage or an exact amount; defaults to the participant's current or equal share"""
+    default_val = (current_shares or {}).get(participant, equal_share)
+    if split_type == "percentage":
+        value = st.number_input(
+            f"{participant}",
+            min_value=0.0,
+            max_value=100.0,
+            value=float(default_val),
+            step=0.1,
+            format="%.1f",
+            key=key,
+            help=f"Percentage for {participant}"
+        )
+        st.caption("(%)")
+    else:  # exact
+        value = st.number_input(
+            f"{participant}",
+            min_value=0.0,
+            value=float(default_val),
+            step=0.01,
+            format="%.2f",
+            key=key,
+            help=f"Exact amount for {participant}"
+        )
+        st.caption("(₹)")
+    return value
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _validate_split_shares_cached(split_type: str, amount: float, share_items: tuple, participants: tuple) -> tuple[bool, str]:
+    """validate_split_shares memoized on hashable arguments; reruns with unchanged shares reuse the result"""
+    return validate_split_shares(split_type, dict(share_items), list(participants), amount)
+
+def _render_share_grid(participants: List[str], split_type: str, amount: float,
+                       current_shares: Optional[Dict[str, float]] = None, key_prefix: str = "") -> Dict[str, float]:
+    """Share inputs for each participant, up to three per row"""
+    num_participants = len(participants)
+    cols_per_row = min(3, num_participants)
+    # The equal share depends only on the split and participant count, so compute it once
+    if split_type == "percentage":
+        kind, equal_share = "pct", round(100.0 / num_participants, 2)
+    else:
+        kind, equal_share = "exact", round(amount / num_participants, 2) if amount > 0 else 0.0
+    # Keys depend only on the participant, so adding or removing someone leaves the other inputs mounted;
+    # a removed participant's value is dropped so it doesn't come back if they are added again
+    key_base = f"{key_prefix}{kind}_"
+    rendered_key = f"_{key_base}participants"
+    for name in set(st.session_state.get(rendered_key, ())).difference(participants):
+        st.session_state.pop(key_base + name, None)
+    st.session_state[rendered_key] = tuple(participants)
+    
+    shares = {}
+    for i in range(0, num_participants, cols_per_row):
+        cols = st.columns(cols_per_row)
+        for j, participant in enumerate(participants[i:i+cols_per_row]):
+            with cols[j]:
+                shares[participant] = _share_input(
+                    participant, split_type, equal_share, current_shares,
+                    key=key_base + participant
+                )
+    return shares
+
+def _render_share_feedback(shares: Dict[str, float], split_type: str, participants: List[str], amount: float) -> tuple[bool, str]:
+    """Running total of the shares against their target, then the validation result"""
+    total = math.fsum(shares.values())
+    if split_type == "percentage":
+        st.markdown(f"<div style='margin-top:0.5em; padding:0.5em; background:#2a2e33; border-radius:5px;'><b>Total: {total:.1f}%</b> (Target: 100%)</div>", unsafe_allow_html=True)
+    else:  # exact
+        st.markdown(f"<div style='margin-top:0.5em; padding:0.5em; background:#2a2e33; border-radius:5px;'><b>Total: ₹{total:.2f}</b> (Target: ₹{amount:.2f})</div>", unsafe_allow_html=True)
+    
+    # Real-time validation feedback
+    is_valid, validation_msg = _validate_split_shares_cached(split_type, amount, tuple(shares.items()), tuple(participants))
+    if validation_msg:
+        if is_valid:
+            st.markdown(f"<div class='validation-success'>✅ {validation_msg}</div>", unsafe_allow_html=True)
+        else:
+            st.markdown(f"<div class='validation-error'>❌ {validation_msg}</div>", unsafe_allow_html=True)
+    return is_valid, validation_msg
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _share_grid_html(split_type: str, shares: tuple) -> str:
+    """All shares as one four-column grid, a single element however many participants there are"""
+    if split_type == "percentage":
+        cells = "".join(f"<div>• <b>{html.escape(participant)}:</b> {share:.1f}%</div>" for participant, share in shares)
+    else:
+        cells = "".join(f"<div>• <b>{html.escape(participant)}:</b> ₹{share:.2f}</div>" for participant, share in shares)
+    return f"<div style='display:grid; grid-template-columns:repeat(4, 1fr); gap:0.3em;'>{cells}</div>"
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _review_markdown(amount: float, description: str, paid_by: str, participants: tuple, category: str,
+                     group: str, split_type: str, shares: tuple) -> tuple[str, str, str]:
+    """Markdown for the review panel: left column, right column and the shares grid (empty if no shares)"""
+    left = "\n\n".join([
+        f"**💰 Amount:** ₹{amount:.2f}",
+        f"**📝 Description:** {description}",
+        f"**💳 Paid by:** {paid_by}",
+        f"**🔄 Split Type:** {split_type.title()}",
+    ])
+    right_lines = [f"**👥 Participants:** {', '.join(participants)}"]
+    if category:
+        right_lines.append(f"**🏷️ Category:** {category}")
+    if group:
+        right_lines.append(f"**👨‍👩‍👧‍👦 Group:** {group}")
+    return left, "\n\n".join(right_lines), _share_grid_html(split_type, shares) if shares else ""
+
 def show_add_expense_tab():
-    st.markdown("<div class='section-header'>Add a New Expense</div>", unsafe_allow_html=True)
+    section("Add a New Expense")
     
-    # Load people and expenses for dropdowns
+    # Load people for dropdowns
     people_list = get_all_people()
-    expenses_data = get_all_expenses()
-    groups_list = get_all_groups(expenses_data)
     
     # Basic expense info - OUTSIDE form so radio button can trigger changes
     col1, col2 = st.columns(2)
@@ -163,7 +469,10 @@ def show_add_expense_tab():
             key="group_input"
         )
     
-    st.markdown("<div class='section-header' style='font-size:1.1em;'>Who Paid?</div>", unsafe_allow_html=True)
+    # Strip the free-text inputs once; everything below uses the stripped values
+    description, category, group = description.strip(), category.strip(), group.strip()
+    
+    section("Who Paid?", small=True)
     
     # Payer selection - OUTSIDE form
     col1, col2 = st.columns(2)
@@ -183,9 +492,9 @@ def show_add_expense_tab():
         )
     
     # Determine final payer
-    paid_by = new_payer.strip() if new_payer.strip() else selected_payer
+    paid_by = new_payer.strip() or selected_payer
     
-    st.markdown("<div class='section-header' style='font-size:1.1em;'>Participants</div>", unsafe_allow_html=True)
+    section("Participants", small=True)
     
     # Participants selection - OUTSIDE form
     selected_participants = st.multiselect(
@@ -202,29 +511,17 @@ def show_add_expense_tab():
         key="new_participants"
     )
     
-    # Combine participants
-    all_participants = list(selected_participants)
-    if new_participants.strip():
-        new_names = [name.strip() for name in new_participants.split(",") if name.strip()]
-        for name in new_names:
-            if name not in all_participants:
-                all_participants.append(name)
-    
-    # Ensure payer is in participants
-    if paid_by and paid_by not in all_participants:
-        all_participants.append(paid_by)
+    # Combine participants, de-duplicated in order; the payer is always included
+    new_names = [name for name in (raw.strip() for raw in new_participants.split(",")) if name]
+    all_participants = list(dict.fromkeys([*selected_participants, *new_names, *([paid_by] if paid_by else [])]))
     
-    st.markdown("<div class='section-header' style='font-size:1.1em;'>Split Method</div>", unsafe_allow_html=True)
+    section("Split Method", small=True)
     
     # Split type selection - OUTSIDE form so it triggers immediate UI changes
     split_type = st.radio(
         "How should this expense be split?",
         options=["equal", "percentage", "exact"],
-        format_func=lambda x: {
-            "equal": "Equal Split",
-            "percentage": "Percentage Split", 
-            "exact": "Exact Amount Split"
-        }[x],
+        format_func=_SPLIT_LABELS.__getitem__,
         horizontal=True,
         key="split_type_radio"
     )
@@ -238,88 +535,13 @@ def show_add_expense_tab():
     if all_participants and split_type in ["percentage", "exact"]:
         st.markdown(f"<div style='margin-top:1em; margin-bottom:0.5em;'><b>Set {split_type.title()} Shares for Each Participant</b></div>", unsafe_allow_html=True)
         
-        # Create a more organized layout for share inputs
-        num_participants = len(all_participants)
-        
-        if num_participants <= 3:
-            # Single row for 3 or fewer participants
-            cols = st.columns(num_participants)
-            for i, participant in enumerate(all_participants):
-                with cols[i]:
-                    if split_type == "percentage":
-                        default_val = round(100.0 / num_participants, 2)
-                        shares[participant] = st.number_input(
-                            f"{participant}",
-                            min_value=0.0,
-                            max_value=100.0,
-                            value=default_val,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"pct_{participant}_{len(all_participants)}",
-                            help=f"Percentage for {participant}"
-                        )
-                        st.caption("(%)")
-                    else:  # exact
-                        default_val = round(amount / num_participants, 2) if amount > 0 else 0.0
-                        shares[participant] = st.number_input(
-                            f"{participant}",
-                            min_value=0.0,
-                            value=default_val,
-                            step=0.01,
-                            format="%.2f",
-                            key=f"exact_{participant}_{len(all_participants)}",
-                            help=f"Exact amount for {participant}"
-                        )
-                        st.caption("(₹)")
-        else:
-            # Multiple rows for more than 3 participants
-            cols_per_row = 3
-            for i in range(0, num_participants, cols_per_row):
-                cols = st.columns(cols_per_row)
-                for j, participant in enumerate(all_participants[i:i+cols_per_row]):
-                    with cols[j]:
-                        if split_type == "percentage":
-                            default_val = round(100.0 / num_participants, 2)
-                            shares[participant] = st.number_input(
-                                f"{participant}",
-                                min_value=0.0,
-                                max_value=100.0,
-                                value=default_val,
-                                step=0.1,
-                                format="%.1f",
-                                key=f"pct_{participant}_{i+j}_{len(all_participants)}",
-                                help=f"Percentage for {participant}"
-                            )
-                            st.caption("(%)")
-                        else:  # exact
-                            default_val = round(amount / num_participants, 2) if amount > 0 else 0.0
-                            shares[participant] = st.number_input(
-                                f"{participant}",
-                                min_value=0.0,
-                                value=default_val,
-                                step=0.01,
-                                format="%.2f",
-                                key=f"exact_{participant}_{i+j}_{len(all_participants)}",
-                                help=f"Exact amount for {participant}"
-                            )
-                            st.caption("(₹)")
+        shares = _render_share_grid(all_participants, split_type, amount)
         
         # Show running total and validation immediately
         if shares:
-            total = sum(shares.values())
-            if split_type == "percentage":
-                st.markdown(f"<div style='margin-top:0.5em; padding:0.5em; background:#2a2e33; border-radius:5px;'><b>Total: {total:.1f}%</b> (Target: 100%)</div>", unsafe_allow_html=True)
-            else:  # exact
-                st.markdown(f"<div style='margin-top:0.5em; padding:0.5em; background:#2a2e33; border-radius:5px;'><b>Total: ₹{total:.2f}</b> (Target: ₹{amount:.2f})</div>", unsafe_allow_html=True)
-            
-            # Real-time validation feedback
-            is_shares_valid, validation_msg = validate_split_shares(split_type, shares, all_participants, amount)
-            if validation_msg:
-                if is_shares_valid:
-                    st.markdown(f"<div class='validation-success'>✅ {validation_msg}</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown(f"<div class='validation-error'>❌ {validation_msg}</div>", unsafe_allow_html=True)
-                    share_validation_msg = validation_msg
+            is_shares_valid, validation_msg = _render_share_feedback(shares, split_type, all_participants, amount)
+            if not is_shares_valid:
+                share_validation_msg = validation_msg
     
     elif split_type in ["percentage", "exact"] and not all_participants:
         # Show message when split type requires participants but none are selected
@@ -337,32 +559,21 @@ def show_add_expense_tab():
                 <h4 style='margin-top:0; color:#51cf66;'>📋 Review Your Expense</h4>
             """, unsafe_allow_html=True)
             
+            # Summary text is rebuilt only when an input actually changes
+            left, right, share_grid = _review_markdown(
+                amount, description, paid_by, tuple(all_participants), category, group, split_type,
+                tuple(shares.items()) if split_type in ["percentage", "exact"] else ()
+            )
+            
             # Create two columns for better layout
             col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown(f"**💰 Amount:** ₹{amount:.2f}")
-                st.markdown(f"**📝 Description:** {description}")
-                st.markdown(f"**💳 Paid by:** {paid_by}")
-                st.markdown(f"**🔄 Split Type:** {split_type.title()}")
-            
-            with col2:
-                st.markdown(f"**👥 Participants:** {', '.join(all_participants)}")
-                if category:
-                    st.markdown(f"**🏷️ Category:** {category}")
-                if group:
-                    st.markdown(f"**👨‍👩‍👧‍👦 Group:** {group}")
+            col1.markdown(left)
+            col2.markdown(right)
             
             # Show shares if applicable
-            if split_type in ["percentage", "exact"] and shares:
+            if share_grid:
                 st.markdown("**📊 Individual Shares:**")
-                share_cols = st.columns(min(4, len(shares)))
-                for i, (participant, share) in enumerate(shares.items()):
-                    with share_cols[i % len(share_cols)]:
-                        if split_type == "percentage":
-                            st.markdown(f"• **{participant}:** {share:.1f}%")
-                        else:
-                            st.markdown(f"• **{participant}:** ₹{share:.2f}")
+                st.markdown(share_grid, unsafe_allow_html=True)
             
             st.markdown("</div>", unsafe_allow_html=True)
         else:
@@ -371,9 +582,9 @@ def show_add_expense_tab():
             missing_fields = []
             if not amount or amount <= 0:
                 missing_fields.append("Amount")
-            if not description.strip():
+            if not description:
                 missing_fields.append("Description")
-            if not paid_by.strip():
+            if not paid_by:
                 missing_fields.append("Who Paid")
             if not all_participants:
                 missing_fields.append("Participants")
@@ -382,19 +593,35 @@ def show_add_expense_tab():
                 st.markdown(f"**Missing:** {', '.join(missing_fields)}")
         
         # Submit button
-        submitted = st.form_submit_button("➕ Add Expense", use_container_width=True, type="primary")
+        # The in-flight token is set before the POST and cleared on the first later run that is not itself a submit,
+        # so clicks queued while the request was running are dropped instead of posting the expense again
+        in_flight = st.session_state.get('_add_expense_in_flight', False)
+        if in_flight and not st.session_state.get('add_expense_submit', False):
+            del st.session_state['_add_expense_in_flight']
+            in_flight = False
+        
+        submitted = st.form_submit_button(
+            "➕ Add Expense",
+            use_container_width=True,
+            type="primary",
+            key="add_expense_submit",
+            disabled=in_flight
+        )
         
         if submitted:
+            if in_flight:
+                st.stop()
+            
             # Validation
             errors = []
             
             if not amount or amount <= 0:
                 errors.append("Amount must be positive")
             
-            if not description.strip():
+            if not description:
                 errors.append("Description is required")
             
-            if not paid_by.strip():
+            if not paid_by:
                 errors.append("Please specify who paid")
             
             if not all_participants:
@@ -408,13 +635,12 @@ def show_add_expense_tab():
                 if not shares:
                     errors.append(f"Please set {split_type} shares for all participants")
                 else:
-                    is_valid, validation_msg = validate_split_shares(split_type, shares, all_participants, amount)
+                    is_valid, validation_msg = _validate_split_shares_cached(split_type, amount, tuple(shares.items()), tuple(all_participants))
                     if not is_valid:
                         errors.append(validation_msg)
             
             if errors:
-                for error in errors:
-                    st.error(error)
+                st.error("\n".join(f"- {error}" for error in errors))
             else:
                 # Prepare expense data - JSON formation
                 expense_data = {
@@ -426,11 +652,11 @@ def show_add_expense_tab():
                 }
                 
                 # Add optional fields
-                if category.strip():
-                    expense_data["category"] = category.strip()
+                if category:
+                    expense_data["category"] = category
                 
-                if group.strip():
-                    expense_data["group"] = group.strip()
+                if group:
+                    expense_data["group"] = group
                 
                 # Add shares for non-equal splits
                 if split_type in ["percentage", "exact"] and shares:
@@ -441,437 +667,406 @@ def show_add_expense_tab():
                     st.json(expense_data)
                 
                 # Submit to backend
+                st.session_state['_add_expense_in_flight'] = True
                 with st.spinner("Adding expense..."):
                     response = make_api_request("/expenses", method="POST", data=expense_data)
                     
                     if response.get("success"):
                         st.success("✅ Expense added successfully!")
-                        # Clear cache to refresh data
-                        get_all_people.clear()
-                        get_all_expenses.clear()
+                        _invalidate_expense_caches()
                         st.rerun()
                     else:
+                        # Nothing was created, so a retry is allowed straight away
+                        st.session_state.pop('_add_expense_in_flight', None)
                         st.error(f"❌ Failed to add expense: {response.get('message', 'Unknown error')}")
 
-def show_edit_delete_section():
-    """Edit and Delete existing expenses section"""
-    st.markdown("<div class='section-header'>Edit / Delete Existing Expense</div>", unsafe_allow_html=True)
+@st.cache_data(ttl=30)
+def _build_expense_options(expenses_sig: tuple) -> List[str]:
+    """Selectbox labels for (amount, description, paid_by, id) rows; cached until the expenses change"""
+    return [f"₹{amount:.2f} - {description} (paid by {paid_by})" for amount, description, paid_by, _ in expenses_sig]
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _payer_options(current_payer: str, people: tuple) -> tuple[tuple, int]:
+    """Payer choices with the current payer included, and the current payer's index"""
+    try:
+        return people, people.index(current_payer)
+    except ValueError:
+        return (current_payer, *people), 0
+
+@st.fragment
+def _edit_fragment(selected_expense: Dict, people_list: List[str]):
+    """Edit form for one expense; input changes rerun only this fragment, a successful update reruns the app"""
+    st.markdown("**Edit the selected expense:**")
     
-    # Load all expenses
-    expenses = get_all_expenses()
-    people_list = get_all_people()
+    # MOVE ALL INPUTS OUTSIDE FORM - Same as Add Expense logic
+    col1, col2 = st.columns(2)
     
-    if not expenses:
-        st.info("📝 No expenses found. Add some expenses first to edit or delete them.")
-        return
+    with col1:
+        edit_amount = st.number_input(
+            "Amount (₹)", 
+            min_value=0.01, 
+            step=0.01, 
+            format="%.2f",
+            value=float(selected_expense['amount']),
+            help="Total amount for this expense",
+            key="edit_amount_input"
+        )
+        edit_description = st.text_input(
+            "Description", 
+            value=selected_expense['description'],
+            help="What was this expense for?",
+            key="edit_description_input"
+        )
     
-    # Create expense options for selectbox
-    expense_options = []
-    expense_map = {}
-    for exp in expenses:
-        option_text = f"₹{exp['amount']:.2f} - {exp['description']} (paid by {exp['paid_by']})"
-        expense_options.append(option_text)
-        expense_map[option_text] = exp
+    with col2:
+        edit_category = st.text_input(
+            "Category", 
+            value=selected_expense.get('category', ''),
+            help="Optional: categorize this expense",
+            key="edit_category_input"
+        )
+        edit_group = st.text_input(
+            "Group", 
+            value=selected_expense.get('group', ''),
+            help="Optional: group this expense belongs to",
+            key="edit_group_input"
+        )
     
-    # Expense selection
-    selected_expense_text = st.selectbox(
-        "Select an expense to edit or delete:",
-        options=[""] + expense_options,
-        help="Choose an expense to modify or remove"
+    # Strip the free-text inputs once; everything below uses the stripped values
+    edit_description, edit_category, edit_group = edit_description.strip(), edit_category.strip(), edit_group.strip()
+    
+    # Payer selection - OUTSIDE form
+    section("Who Paid?", small=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        current_payer = selected_expense['paid_by']
+        payer_options, payer_index = _payer_options(current_payer, tuple(people_list))
+        edit_paid_by = st.selectbox(
+            "Select from existing people:",
+            options=payer_options,
+            index=payer_index,
+            help="Who paid for this expense",
+            key="edit_selected_payer"
+        )
+    with col2:
+        edit_new_payer = st.text_input(
+            "Or add new person:",
+            placeholder="Type new name here",
+            help="Add a new person as the payer",
+            key="edit_new_payer"
+        )
+    
+    final_payer = edit_new_payer.strip() or edit_paid_by
+    
+    # Participants selection - OUTSIDE form
+    section("Participants", small=True)
+    current_participants = selected_expense.get('participants', [])
+    edit_participants = st.multiselect(
+        "Select from existing people:",
+        options=people_list,
+        default=[p for p in current_participants if p in people_list],
+        help="Who participated in this expense",
+        key="edit_selected_participants"
     )
     
-    if not selected_expense_text:
-        st.info("👆 Select an expense above to edit or delete it")
-        return
+    edit_new_participants = st.text_input(
+        "Add new participants (comma separated):",
+        placeholder="John, Mary, Alex",
+        help="Add new people (comma separated)",
+        key="edit_new_participants"
+    )
     
-    selected_expense = expense_map[selected_expense_text]
+    # Combine selected, new and original participants, de-duplicated in order; the payer is always included
+    new_names = [name for name in (raw.strip() for raw in edit_new_participants.split(",")) if name]
+    all_edit_participants = list(dict.fromkeys([
+        *edit_participants,
+        *new_names,
+        *current_participants,
+        *([final_payer] if final_payer else [])
+    ]))
     
-    # Create two tabs for Edit and Delete
-    tab1, tab2 = st.tabs(["✏️ Edit Expense", "🗑️ Delete Expense"])
+    # Split type selection - OUTSIDE form
+    section("Split Method", small=True)
+    current_split_type = selected_expense.get('split_type', 'equal')
+    edit_split_type = st.radio(
+        "How should this expense be split?",
+        options=["equal", "percentage", "exact"],
+        index=["equal", "percentage", "exact"].index(current_split_type),
+        format_func=_SPLIT_LABELS.__getitem__,
+        horizontal=True,
+        key="edit_split_type_radio"
+    )
     
-    with tab1:
-        st.markdown("**Edit the selected expense:**")
-        
-        # MOVE ALL INPUTS OUTSIDE FORM - Same as Add Expense logic
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            edit_amount = st.number_input(
-                "Amount (₹)", 
-                min_value=0.01, 
-                step=0.01, 
-                format="%.2f",
-                value=float(selected_expense['amount']),
-                help="Total amount for this expense",
-                key="edit_amount_input"
-            )
-            edit_description = st.text_input(
-                "Description", 
-                value=selected_expense['description'],
-                help="What was this expense for?",
-                key="edit_description_input"
-            )
-        
-        with col2:
-            edit_category = st.text_input(
-                "Category", 
-                value=selected_expense.get('category', ''),
-                help="Optional: categorize this expense",
-                key="edit_category_input"
-            )
-            edit_group = st.text_input(
-                "Group", 
-                value=selected_expense.get('group', ''),
-                help="Optional: group this expense belongs to",
-                key="edit_group_input"
-            )
-        
-        # Payer selection - OUTSIDE form
-        st.markdown("<div class='section-header' style='font-size:1.1em;'>Who Paid?</div>", unsafe_allow_html=True)
-        col1, col2 = st.columns(2)
-        with col1:
-            current_payer = selected_expense['paid_by']
-            payer_options = people_list if current_payer in people_list else [current_payer] + people_list
-            edit_paid_by = st.selectbox(
-                "Select from existing people:",
-                options=payer_options,
-                index=payer_options.index(current_payer) if current_payer in payer_options else 0,
-                help="Who paid for this expense",
-                key="edit_selected_payer"
-            )
-        with col2:
-            edit_new_payer = st.text_input(
-                "Or add new person:",
-                placeholder="Type new name here",
-                help="Add a new person as the payer",
-                key="edit_new_payer"
-            )
-        
-        final_payer = edit_new_payer.strip() if edit_new_payer.strip() else edit_paid_by
-        
-        # Participants selection - OUTSIDE form
-        st.markdown("<div class='section-header' style='font-size:1.1em;'>Participants</div>", unsafe_allow_html=True)
-        current_participants = selected_expense.get('participants', [])
-        edit_participants = st.multiselect(
-            "Select from existing people:",
-            options=people_list,
-            default=[p for p in current_participants if p in people_list],
-            help="Who participated in this expense",
-            key="edit_selected_participants"
-        )
+    # Dynamic share inputs - OUTSIDE form so they appear immediately
+    edit_shares = {}
+    edit_shares_valid = True
+    
+    # Show share inputs immediately when percentage or exact is selected AND participants exist
+    if all_edit_participants and edit_split_type in ["percentage", "exact"]:
+        st.markdown(f"<div style='margin-top:1em; margin-bottom:0.5em;'><b>Set {edit_split_type.title()} Shares for Each Participant</b></div>", unsafe_allow_html=True)
         
-        edit_new_participants = st.text_input(
-            "Add new participants (comma separated):",
-            placeholder="John, Mary, Alex",
-            help="Add new people (comma separated)",
-            key="edit_new_participants"
+        edit_shares = _render_share_grid(
+            all_edit_participants, edit_split_type, edit_amount,
+            current_shares=selected_expense.get('shares'), key_prefix="edit_"
         )
+    
+    # Show running total and validation immediately
+    if edit_shares:
+        edit_shares_valid, _ = _render_share_feedback(edit_shares, edit_split_type, all_edit_participants, edit_amount)
+    
+    elif edit_split_type in ["percentage", "exact"] and not all_edit_participants:
+        # Show message when split type requires participants but none are selected
+        st.warning(f"⚠️ Please add participants first to set up {edit_split_type} split")
+    
+    # Add some spacing before the form
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # NOW the form - only for submission
+    with st.form("edit_expense_form"):
+        # Only show review section if we have enough information
+        if edit_amount and edit_description and final_payer and all_edit_participants:
+            st.markdown("""
+            <div style='margin-bottom:1.5em; padding:1.2em; background:#2a2e33; border-radius:8px; border:1px solid #444;'>
+                <h4 style='margin-top:0; color:#51cf66;'>📋 Review Updated Expense</h4>
+            """, unsafe_allow_html=True)
+            
+            # Create two columns for better layout
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown(f"**💰 Amount:** ₹{edit_amount:.2f}")
+                st.markdown(f"**📝 Description:** {edit_description}")
+                st.markdown(f"**💳 Paid by:** {final_payer}")
+                st.markdown(f"**🔄 Split Type:** {edit_split_type.title()}")
+            
+            with col2:
+                st.markdown(f"**👥 Participants:** {', '.join(all_edit_participants)}")
+                if edit_category:
+                    st.markdown(f"**🏷️ Category:** {edit_category}")
+                if edit_group:
+                    st.markdown(f"**👨‍👩‍👧‍👦 Group:** {edit_group}")
         
-        # Combine participants
-        all_edit_participants = list(edit_participants)
-        if edit_new_participants.strip():
-            new_names = [name.strip() for name in edit_new_participants.split(",") if name.strip()]
-            for name in new_names:
-                if name not in all_edit_participants:
-                    all_edit_participants.append(name)
-        
-        # Add any missing participants from original expense
-        for participant in current_participants:
-            if participant not in all_edit_participants:
-                all_edit_participants.append(participant)
+        # Show shares if applicable
+        if edit_split_type in ["percentage", "exact"] and edit_shares:
+            st.markdown("**📊 Individual Shares:**")
+            st.markdown(_share_grid_html(edit_split_type, tuple(edit_shares.items())), unsafe_allow_html=True)
         
-        # Ensure payer is in participants
-        if final_payer and final_payer not in all_edit_participants:
-            all_edit_participants.append(final_payer)
+        st.markdown("</div>", unsafe_allow_html=True)
+        # Show a helpful message when info is missing
+        missing_fields = []
+        if not edit_amount or edit_amount <= 0:
+            missing_fields.append("Amount")
+        if not edit_description:
+            missing_fields.append("Description")
+        if not final_payer:
+            missing_fields.append("Who Paid")
+        if not all_edit_participants:
+            missing_fields.append("Participants")
         
-        # Split type selection - OUTSIDE form
-        st.markdown("<div class='section-header' style='font-size:1.1em;'>Split Method</div>", unsafe_allow_html=True)
-        current_split_type = selected_expense.get('split_type', 'equal')
-        edit_split_type = st.radio(
-            "How should this expense be split?",
-            options=["equal", "percentage", "exact"],
-            index=["equal", "percentage", "exact"].index(current_split_type),
-            format_func=lambda x: {
-                "equal": "Equal Split",
-                "percentage": "Percentage Split", 
-                "exact": "Exact Amount Split"
-            }[x],
-            horizontal=True,
-            key="edit_split_type_radio"
-        )
+        if missing_fields:
+            st.markdown(f"**Missing:** {', '.join(missing_fields)}")
         
-        # Dynamic share inputs - OUTSIDE form so they appear immediately
-        edit_shares = {}
-        edit_shares_valid = True
+        # Submit update button
+        submitted_edit = st.form_submit_button("💾 Update Expense", use_container_width=True, type="primary")
         
-        # Show share inputs immediately when percentage or exact is selected AND participants exist
-        if all_edit_participants and edit_split_type in ["percentage", "exact"]:
-            st.markdown(f"<div style='margin-top:1em; margin-bottom:0.5em;'><b>Set {edit_split_type.title()} Shares for Each Participant</b></div>", unsafe_allow_html=True)
-            
-            current_shares = selected_expense.get('shares', {})
-            num_participants = len(all_edit_participants)
+        if submitted_edit:
+            # Validation
+            errors = []
             
-            if num_participants <= 3:
-                # Single row for 3 or fewer participants
-                cols = st.columns(num_participants)
-                for i, participant in enumerate(all_edit_participants):
-                    with cols[i]:
-                        if edit_split_type == "percentage":
-                            default_val = current_shares.get(participant, round(100.0 / num_participants, 2))
-                            edit_shares[participant] = st.number_input(
-                                f"{participant}",
-                                min_value=0.0,
-                                max_value=100.0,
-                                value=float(default_val),
-                                step=0.1,
-                                format="%.1f",
-                                key=f"edit_pct_{participant}_{len(all_edit_participants)}",
-                                help=f"Percentage for {participant}"
-                            )
-                            st.caption("(%)")
-                        else:  # exact
-                            default_val = current_shares.get(participant, round(edit_amount / num_participants, 2))
-                            edit_shares[participant] = st.number_input(
-                                f"{participant}",
-                                min_value=0.0,
-                                value=float(default_val),
-                                step=0.01,
-                                format="%.2f",
-                                key=f"edit_exact_{participant}_{len(all_edit_participants)}",
-                                help=f"Exact amount for {participant}"
-                            )
-                            st.caption("(₹)")
-            else:
-                # Multiple rows for more than 3 participants
-                cols_per_row = 3
-                for i in range(0, num_participants, cols_per_row):
-                    cols = st.columns(cols_per_row)
-                    for j, participant in enumerate(all_edit_participants[i:i+cols_per_row]):
-                        with cols[j]:
-                            if edit_split_type == "percentage":
-                                default_val = current_shares.get(participant, round(100.0 / num_participants, 2))
-                                edit_shares[participant] = st.number_input(
-                                    f"{participant}",
-                                    min_value=0.0,
-                                    max_value=100.0,
-                                    value=float(default_val),
-                                    step=0.1,
-                                    format="%.1f",
-                                    key=f"edit_pct_{participant}_{i+j}_{len(all_edit_participants)}",
-                                    help=f"Percentage for {participant}"
-                                )
-                                st.caption("(%)")
-                            else:  # exact
-                                default_val = current_shares.get(participant, round(edit_amount / num_participants, 2))
-                                edit_shares[participant] = st.number_input(
-                                    f"{participant}",
-                                    min_value=0.0,
-                                    value=float(default_val),
-                                    step=0.01,
-                                    format="%.2f",
-                                    key=f"edit_exact_{participant}_{i+j}_{len(all_edit_participants)}",
-                                    help=f"Exact amount for {participant}"
-                                )
-                                st.caption("(₹)")
-        
-        # Show running total and validation immediately
-        if edit_shares:
-            total = sum(edit_shares.values())
-            if edit_split_type == "percentage":
-                st.markdown(f"<div style='margin-top:0.5em; padding:0.5em; background:#2a2e33; border-radius:5px;'><b>Total: {total:.1f}%</b> (Target: 100%)</div>", unsafe_allow_html=True)
-            else:  # exact
-                st.markdown(f"<div style='margin-top:0.5em; padding:0.5em; background:#2a2e33; border-radius:5px;'><b>Total: ₹{total:.2f}</b> (Target: ₹{edit_amount:.2f})</div>", unsafe_allow_html=True)
+            if not edit_amount or edit_amount <= 0:
+                errors.append("Amount must be positive")
             
-            # Real-time validation feedback
-            edit_shares_valid, validation_msg = validate_split_shares(edit_split_type, edit_shares, all_edit_participants, edit_amount)
-            if validation_msg:
-                if edit_shares_valid:
-                    st.markdown(f"<div class='validation-success'>✅ {validation_msg}</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown(f"<div class='validation-error'>❌ {validation_msg}</div>", unsafe_allow_html=True)
-        
-        elif edit_split_type in ["percentage", "exact"] and not all_edit_participants:
-            # Show message when split type requires participants but none are selected
-            st.warning(f"⚠️ Please add participants first to set up {edit_split_type} split")
-        
-        # Add some spacing before the form
-        st.markdown("<br>", unsafe_allow_html=True)
-        
-        # NOW the form - only for submission
-        with st.form("edit_expense_form"):
-            # Only show review section if we have enough information
-            if edit_amount and edit_description and final_payer and all_edit_participants:
-                st.markdown("""
-                <div style='margin-bottom:1.5em; padding:1.2em; background:#2a2e33; border-radius:8px; border:1px solid #444;'>
-                    <h4 style='margin-top:0; color:#51cf66;'>📋 Review Updated Expense</h4>
-                """, unsafe_allow_html=True)
-                
-                # Create two columns for better layout
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown(f"**💰 Amount:** ₹{edit_amount:.2f}")
-                    st.markdown(f"**📝 Description:** {edit_description}")
-                    st.markdown(f"**💳 Paid by:** {final_payer}")
-                    st.markdown(f"**🔄 Split Type:** {edit_split_type.title()}")
-                
-                with col2:
-                    st.markdown(f"**👥 Participants:** {', '.join(all_edit_participants)}")
-                    if edit_category:
-                        st.markdown(f"**🏷️ Category:** {edit_category}")
-                    if edit_group:
-                        st.markdown(f"**👨‍👩‍👧‍👦 Group:** {edit_group}")
+            if not edit_description:
+                errors.append("Description is required")
             
-            # Show shares if applicable
-            if edit_split_type in ["percentage", "exact"] and edit_shares:
-                st.markdown("**📊 Individual Shares:**")
-                share_cols = st.columns(min(4, len(edit_shares)))
-                for i, (participant, share) in enumerate(edit_shares.items()):
-                    with share_cols[i % len(share_cols)]:
-                        if edit_split_type == "percentage":
-                            st.markdown(f"• **{participant}:** {share:.1f}%")
-                        else:
-                            st.markdown(f"• **{participant}:** ₹{share:.2f}")
+            if not final_payer:
+                errors.append("Please specify who paid")
             
-            st.markdown("</div>", unsafe_allow_html=True)
-            # Show a helpful message when info is missing
-            missing_fields = []
-            if not edit_amount or edit_amount <= 0:
-                missing_fields.append("Amount")
-            if not edit_description.strip():
-                missing_fields.append("Description")
-            if not final_payer.strip():
-                missing_fields.append("Who Paid")
             if not all_edit_participants:
-                missing_fields.append("Participants")
+                errors.append("At least one participant is required")
             
-            if missing_fields:
-                st.markdown(f"**Missing:** {', '.join(missing_fields)}")
+            if final_payer and final_payer not in all_edit_participants:
+                errors.append("Payer must be one of the participants")
             
-            # Submit update button
-            submitted_edit = st.form_submit_button("💾 Update Expense", use_container_width=True, type="primary")
+            # Validate shares for non-equal splits
+            if edit_split_type in ["percentage", "exact"]:
+                if not edit_shares:
+                    errors.append(f"Please set {edit_split_type} shares for all participants")
+                else:
+                    is_valid, validation_msg = _validate_split_shares_cached(edit_split_type, edit_amount, tuple(edit_shares.items()), tuple(all_edit_participants))
+                    if not is_valid:
+                        errors.append(validation_msg)
             
-            if submitted_edit:
-                # Validation
-                errors = []
-                
-                if not edit_amount or edit_amount <= 0:
-                    errors.append("Amount must be positive")
-                
-                if not edit_description.strip():
-                    errors.append("Description is required")
+            if errors:
+                st.error("\n".join(f"- {error}" for error in errors))
+            else:
+                # Prepare update data
+                update_data = {
+                    "amount": edit_amount,
+                    "description": edit_description,
+                    "paid_by": final_payer,
+                    "participants": all_edit_participants,
+                    "split_type": edit_split_type
+                }
                 
-                if not final_payer.strip():
-                    errors.append("Please specify who paid")
+                if edit_category:
+                    update_data["category"] = edit_category
                 
-                if not all_edit_participants:
-                    errors.append("At least one participant is required")
+                if edit_group:
+                    update_data["group"] = edit_group
                 
-                if final_payer and final_payer not in all_edit_participants:
-                    errors.append("Payer must be one of the participants")
+                if edit_split_type in ["percentage", "exact"] and edit_shares:
+                    update_data["shares"] = edit_shares
                 
-                # Validate shares for non-equal splits
-                if edit_split_type in ["percentage", "exact"]:
-                    if not edit_shares:
-                        errors.append(f"Please set {edit_split_type} shares for all participants")
-                    else:
-                        is_valid, validation_msg = validate_split_shares(edit_split_type, edit_shares, all_edit_participants, edit_amount)
-                        if not is_valid:
-                            errors.append(validation_msg)
+                # Debug: Show the JSON being sent
+                with st.expander("🔍 Debug: JSON being sent to API"):
+                    st.json(update_data)
                 
-                if errors:
-                    for error in errors:
-                        st.error(error)
-                else:
-                    # Prepare update data
-                    update_data = {
-                        "amount": edit_amount,
-                        "description": edit_description,
-                        "paid_by": final_payer,
-                        "participants": all_edit_participants,
-                        "split_type": edit_split_type
-                    }
-                    
-                    if edit_category.strip():
-                        update_data["category"] = edit_category.strip()
-                    
-                    if edit_group.strip():
-                        update_data["group"] = edit_group.strip()
-                    
-                    if edit_split_type in ["percentage", "exact"] and edit_shares:
-                        update_data["shares"] = edit_shares
-                    
-                    # Debug: Show the JSON being sent
-                    with st.expander("🔍 Debug: JSON being sent to API"):
-                        st.json(update_data)
+                # Submit update
+                with st.status("Updating expense...") as status:
+                    status.write("Sending changes")
+                    response = make_api_request(f"/expenses/{selected_expense['id']}", method="PUT", data=update_data)
                     
-                    # Submit update
-                    with st.spinner("Updating expense..."):
-                        response = make_api_request(f"/expenses/{selected_expense['id']}", method="PUT", data=update_data)
-                        
-                        if response.get("success"):
-                            st.success("✅ Expense updated successfully!")
-                            # Clear cache to refresh data
-                            get_all_people.clear()
-                            get_all_expenses.clear()
-                            st.rerun()
+                    if response.get("success"):
+                        status.write("Refreshing expense list")
+                        if response.get("data"):
+                            _apply_local_expense_change(selected_expense['id'], response["data"])
                         else:
-                            st.error(f"❌ Failed to update expense: {response.get('message', 'Unknown error')}")
+                            _invalidate_expense_caches()
+                        status.update(label="✅ Expense updated successfully!", state="complete")
+                        st.rerun()
+                    else:
+                        status.update(label="❌ Update failed", state="error")
+                        st.error(f"❌ Failed to update expense: {response.get('message', 'Unknown error')}")
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _delete_card_html(expense_id: int, amount: float, description: str, paid_by: str, participants: tuple,
+                      split_type: str, group: Optional[str], category: Optional[str]) -> str:
+    """Delete confirmation card, built once per distinct expense, with user-entered text escaped"""
+    group_html = f"<p><strong>Group:</strong> {html.escape(group)}</p>" if group else ""
+    category_html = f"<p><strong>Category:</strong> {html.escape(category)}</p>" if category else ""
+    return f"""
+<div class='card' style='border-left: 4px solid #ff6b6b;'>
+    <h4>⚠️ Are you sure you want to delete this expense?</h4>
+    <p><strong>Amount:</strong> ₹{amount:.2f}</p>
+    <p><strong>Description:</strong> {html.escape(description)}</p>
+    <p><strong>Paid by:</strong> {html.escape(paid_by)}</p>
+    <p><strong>Participants:</strong> {html.escape(', '.join(participants))}</p>
+    <p><strong>Split Type:</strong> {split_type.title()}</p>
+    {group_html}
+    {category_html}
+</div>
+"""
+
+def show_edit_delete_section():
+    """Edit and Delete existing expenses section"""
+    section("Edit / Delete Existing Expense")
+    
+    # Load all expenses
+    people_list, _, expenses = _prefetch_people_and_expenses()
+    
+    if not expenses:
+        st.info("📝 No expenses found. Add some expenses first to edit or delete them.")
+        return
+    
+    # Create expense options for selectbox
+    expense_options = _build_expense_options(
+        tuple((exp['amount'], exp['description'], exp['paid_by'], exp.get('id')) for exp in expenses)
+    )
+    expense_map = dict(zip(expense_options, expenses))
+    
+    # Expense selection
+    selected_expense_text = st.selectbox(
+        "Select an expense to edit or delete:",
+        options=[""] + expense_options,
+        help="Choose an expense to modify or remove"
+    )
+    
+    if not selected_expense_text:
+        st.info("👆 Select an expense above to edit or delete it")
+        return
+    
+    selected_expense = expense_map[selected_expense_text]
+    
+    # Create two tabs for Edit and Delete
+    tab1, tab2 = st.tabs(["✏️ Edit Expense", "🗑️ Delete Expense"])
+    
+    with tab1:
+        _edit_fragment(selected_expense, people_list)
     
     with tab2:
         st.markdown("**Delete the selected expense:**")
         
         # Show expense details for confirmation
-        st.markdown(f"""
-        <div class='card' style='border-left: 4px solid #ff6b6b;'>
-            <h4>⚠️ Are you sure you want to delete this expense?</h4>
-            <p><strong>Amount:</strong> ₹{selected_expense['amount']:.2f}</p>
-            <p><strong>Description:</strong> {selected_expense['description']}</p>
-            <p><strong>Paid by:</strong> {selected_expense['paid_by']}</p>
-            <p><strong>Participants:</strong> {', '.join(selected_expense.get('participants', []))}</p>
-            <p><strong>Split Type:</strong> {selected_expense.get('split_type', 'equal').title()}</p>
-            {f"<p><strong>Group:</strong> {selected_expense.get('group', 'None')}</p>" if selected_expense.get('group') else ""}
-            {f"<p><strong>Category:</strong> {selected_expense.get('category', 'None')}</p>" if selected_expense.get('category') else ""}
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_delete_card_html(
+            selected_expense['id'],
+            selected_expense['amount'],
+            selected_expense['description'],
+            selected_expense['paid_by'],
+            tuple(selected_expense.get('participants', [])),
+            selected_expense.get('split_type', 'equal'),
+            selected_expense.get('group'),
+            selected_expense.get('category')
+        ), unsafe_allow_html=True)
         
         st.warning("⚠️ This action cannot be undone!")
         
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
             if st.button("🗑️ Delete Expense", use_container_width=True, type="primary"):
-                with st.spinner("Deleting expense..."):
+                with st.status("Deleting expense...") as status:
+                    status.write("Sending delete")
                     response = make_api_request(f"/expenses/{selected_expense['id']}", method="DELETE")
                     
                     if response.get("success"):
-                        st.success("✅ Expense deleted successfully!")
-                        # Clear cache to refresh data
-                        get_all_people.clear()
-                        get_all_expenses.clear()
+                        status.write("Refreshing expense list")
+                        _apply_local_expense_change(selected_expense['id'], None)
+                        status.update(label="✅ Expense deleted successfully!", state="complete")
                         st.rerun()
                     else:
+                        status.update(label="❌ Delete failed", state="error")
                         st.error(f"❌ Failed to delete expense: {response.get('message', 'Unknown error')}")
 
+def _expense_card_html(exp: Dict) -> str:
+    """History card for one expense, with user-entered text escaped"""
+    participants_str = html.escape(', '.join(exp.get('participants', [])))
+    group_str = html.escape(exp.get('group') or 'No Group')
+    category_str = html.escape(exp.get('category') or 'Uncategorized')
+    return f"""
+<div class='card'>
+    <div style='display: flex; justify-content: space-between; align-items: flex-start;'>
+        <div>
+            <h4 style='margin: 0 0 0.5em 0; color: #51cf66;'>₹{exp['amount']:.2f}</h4>
+            <p style='margin: 0 0 0.3em 0; font-size: 1.1em;'><strong>{html.escape(exp['description'])}</strong></p>
+            <p style='margin: 0; color: #999; font-size: 0.9em;'>
+                Paid by <strong>{html.escape(exp['paid_by'])}</strong> • {exp['split_type'].title()} split
+            </p>
+            <p style='margin: 0.3em 0 0 0; color: #999; font-size: 0.9em;'>
+                Group: {group_str} • Category: {category_str}
+            </p>
+            <p style='margin: 0.3em 0 0 0; color: #999; font-size: 0.9em;'>
+                Participants: {participants_str}
+            </p>
+        </div>
+    </div>
+</div>
+"""
+
 def show_expense_history_tab():
-    st.markdown("<div class='section-header'>Expense History</div>", unsafe_allow_html=True)
+    section("Expense History")
     
     with st.spinner("Loading expenses..."):
-        expenses = get_all_expenses()
+        bootstrap = get_bootstrap()
+    expenses = bootstrap["expenses"]
     
     if not expenses:
         st.info("📝 No expenses found. Add your first expense in the 'Add Expense' tab!")
         return
     
     # Filters
-    groups = get_all_groups(expenses)
-    all_people = sorted(set(
-        p for exp in expenses 
-        for p in ([exp['paid_by']] + exp.get('participants', []))
-    ))
-    categories = sorted(set(
-        (exp.get('category') or 'Uncategorized')
-        for exp in expenses
-    ))
+    groups = bootstrap["groups"]
+    all_people = bootstrap["people_union"]
+    categories = bootstrap["categories"]
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -881,72 +1076,68 @@ def show_expense_history_tab():
     with col3:
         selected_category = st.selectbox("Filter by Category:", ["All"] + categories)
     
-    # Apply filters
-    filtered_expenses = expenses
-    
-    if selected_group != "All":
-        filtered_expenses = [e for e in filtered_expenses if e.get('group') == selected_group]
-    
-    if selected_person != "All":
-        filtered_expenses = [
-            e for e in filtered_expenses 
-            if selected_person == e['paid_by'] or selected_person in e.get('participants', [])
+    # A selected person narrows to their expenses through the index; the other filters run in a single pass
+    if selected_person == "All":
+        candidates = expenses
+    elif bootstrap["indexed_count"] == len(expenses):
+        candidates = [expenses[i] for i in bootstrap["by_person"].get(selected_person, ())]
+    else:
+        candidates = [
+            e for e in expenses
+            if selected_person == e['paid_by'] or selected_person in e.get('participants', ())
         ]
-    
-    if selected_category != "All":
+    if selected_group == selected_category == "All":
+        filtered_expenses = candidates
+    else:
         filtered_expenses = [
-            e for e in filtered_expenses 
-            if e.get('category', 'Uncategorized') == selected_category
+            e for e in candidates
+            if (selected_group == "All" or e.get('group') == selected_group)
+            and (selected_category == "All" or (e.get('category') or 'Uncategorized') == selected_category)
         ]
     
     st.markdown(f"<div style='margin-bottom:1em;'><b>{len(filtered_expenses)} of {len(expenses)} expenses shown</b></div>", unsafe_allow_html=True)
     
-    # Display expenses
-    for exp in filtered_expenses:
-        participants_str = ', '.join(exp.get('participants', []))
-        group_str = exp.get('group', 'No Group')
-        category_str = exp.get('category', 'Uncategorized')
-        
-        st.markdown(f"""
-        <div class='card'>
-            <div style='display: flex; justify-content: space-between; align-items: flex-start;'>
-                <div>
-                    <h4 style='margin: 0 0 0.5em 0; color: #51cf66;'>₹{exp['amount']:.2f}</h4>
-                    <p style='margin: 0 0 0.3em 0; font-size: 1.1em;'><strong>{exp['description']}</strong></p>
-                    <p style='margin: 0; color: #999; font-size: 0.9em;'>
-                        Paid by <strong>{exp['paid_by']}</strong> • {exp['split_type'].title()} split
-                    </p>
-                    <p style='margin: 0.3em 0 0 0; color: #999; font-size: 0.9em;'>
-                        Group: {group_str} • Category: {category_str}
-                    </p>
-                    <p style='margin: 0.3em 0 0 0; color: #999; font-size: 0.9em;'>
-                        Participants: {participants_str}
-                    </p>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    # Only the current page is rendered, so the cost stays flat however long the history gets
+    num_pages = max(1, math.ceil(len(filtered_expenses) / _HISTORY_PAGE_SIZE))
+    page = 1
+    if num_pages > 1:
+        page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1)
+        st.caption(f"Page {page} of {num_pages}")
+    rows = filtered_expenses[(page - 1) * _HISTORY_PAGE_SIZE:page * _HISTORY_PAGE_SIZE]
+    
+    # Display expenses as one HTML block: a single element instead of one per expense
+    st.markdown("".join(_expense_card_html(exp) for exp in rows), unsafe_allow_html=True)
+
+# Balance table columns shown as rupee amounts
+_CURRENCY_COLUMNS = {
+    column: st.column_config.NumberColumn(format="₹%.2f")
+    for column in ("spent", "owed", "balance")
+}
 
 def show_dashboard_tab():
-    st.markdown("<div class='section-header'>Dashboard</div>", unsafe_allow_html=True)
+    section("Dashboard")
+    
+    # Both requests go out together, so the wait is the slower of the two rather than their sum
+    with st.spinner("Loading balances and settlements..."):
+        balances_future = _submit(make_api_request, "/balances")
+        settlements_future = _submit(make_api_request, "/settlements")
+        balances_response = balances_future.result()
+        settlements_response = settlements_future.result()
     
     col1, col2 = st.columns(2)
     
     # Balances
     with col1:
         st.markdown("**💰 Balances**")
-        with st.spinner("Loading balances..."):
-            response = make_api_request("/balances")
+        response = balances_response
         
         if response.get("success"):
             balances = response.get("data", [])
             if balances:
+                import pandas as pd  # Only needed for this table; kept off the startup path
                 df = pd.DataFrame(balances)
-                # Format currency columns
-                df['spent'] = df['spent'].apply(lambda x: f"₹{x:.2f}")
-                df['owed'] = df['owed'].apply(lambda x: f"₹{x:.2f}")
-                df['balance'] = df['balance'].apply(lambda x: f"₹{x:.2f}")
-                st.dataframe(df, use_container_width=True, hide_index=True)
+                # Currency columns stay numeric (and sortable); the frontend applies the format
+                st.dataframe(df, use_container_width=True, hide_index=True, column_config=_CURRENCY_COLUMNS)
             else:
                 st.info("No balances to show. Add some expenses first!")
         else:
@@ -955,8 +1146,7 @@ def show_dashboard_tab():
     # Settlements
     with col2:
         st.markdown("**🔄 Settlement Suggestions**")
-        with st.spinner("Calculating settlements..."):
-            response = make_api_request("/settlements")
+        response = settlements_response
         
         if response.get("success"):
             settlements = response.get("data", [])
@@ -977,23 +1167,29 @@ def show_dashboard_tab():
     col1, col2, col3 = st.columns(3)
     
     with col1:
+        # The check runs on a worker thread; a fragment polls for it so the rest of the page stays usable
         if st.button("🔍 Check Database Health", use_container_width=True):
-            with st.spinner("Checking..."):
-                resp = make_api_request("/health")
-                if resp.get("success") and resp.get("data", {}).get("status") == "healthy":
-                    st.success("✅ Database is healthy")
-                else:
-                    st.error("❌ Database connection issues")
+            st.session_state['_health_future'] = _submit(_check_health)
+        if '_health_future' in st.session_state:
+            _health_status()
+        elif '_health' in st.session_state:
+            resp = st.session_state.pop('_health')
+            if resp.get("success") and resp.get("data", {}).get("status") == "healthy":
+                st.success("✅ Database is healthy")
+            else:
+                st.error("❌ Database connection issues")
     
     with col2:
-        docs_url = BACKEND_URL.replace("/api/v1", "/docs")
-        if st.button("📚 View API Docs", use_container_width=True):
-            st.markdown(f"[🔗 Open API Documentation]({docs_url})")
+        if ENABLE_DOCS:
+            docs_url = BACKEND_URL.replace("/api/v1", "/docs")
+            if st.button("📚 View API Docs", use_container_width=True):
+                st.markdown(f"[🔗 Open API Documentation]({docs_url})")
     
     with col3:
         if st.button("🔄 Refresh Data", use_container_width=True):
+            # Re-read the version only; the expense list is downloaded again only if it changed
             get_all_people.clear()
-            get_all_expenses.clear()
+            _get_expenses_version.clear()
             st.success("Data refreshed!")
             st.rerun()
     
@@ -1007,6 +1203,22 @@ def show_dashboard_tab():
     </div>
     """, unsafe_allow_html=True)
 
+@st.cache_data(ttl=30, show_spinner=False)
+def _check_health() -> Dict:
+    """Backend health; repeat checks within 30 seconds reuse the last answer"""
+    return make_api_request("/health")
+
+@st.fragment(run_every=1)
+def _health_status():
+    """Poll the pending health check, then rerun the app to show its result"""
+    future = st.session_state['_health_future']
+    if not future.done():
+        st.caption("⏳ Checking database health...")
+        return
+    st.session_state['_health'] = future.result()
+    del st.session_state['_health_future']
+    st.rerun()
+
 def main():
     st.markdown("<h1 style='text-align:center; font-size:2.5rem; margin-bottom:0.2em; color:#51cf66;'>💚 SplitEase</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align:center; color:#999; margin-bottom:2em; font-size:1.1em;'>Simple expense sharing for everyone</p>", unsafe_allow_html=True)
@@ -1014,23 +1226,28 @@ def main():
     # Initialize data on first load
     if not st.session_state.people_list:
         with st.spinner("Loading initial data..."):
-            st.session_state.people_list = get_all_people()
-            st.session_state.expenses_data = get_all_expenses()
-    
-    # Main tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["➕ Add Expense", "✏️ Edit/Delete", "📜 Expense History", "📊 Dashboard"])
+            bootstrap = get_bootstrap()
+            st.session_state.people_list = bootstrap["people"]
+            st.session_state.expenses_data = bootstrap["expenses"]
     
-    with tab1:
-        show_add_expense_tab()
-    
-    with tab2:
-        show_edit_delete_section()
-    
-    with tab3:
-        show_expense_history_tab()
-    
-    with tab4:
-        show_dashboard_tab()
+    # Main tabs: st.tabs would run every tab's body (and its API calls) on each rerun,
+    # so the tab bar is a radio and only the selected page is rendered
+    active_tab = st.radio(
+        "Navigation",
+        options=list(_TABS),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="active_tab"
+    )
+    _TABS[active_tab]()
+
+# Tab label -> page renderer
+_TABS = {
+    "➕ Add Expense": show_add_expense_tab,
+    "✏️ Edit/Delete": show_edit_delete_section,
+    "📜 Expense History": show_expense_history_tab,
+    "📊 Dashboard": show_dashboard_tab,
+}
 
 if __name__ == "__main__":
     main()